@@ -0,0 +1,324 @@
+"""
+Load and latency benchmark for the orchestrator API.
+
+Drives POST /events and GET /context in-process through FastAPI's TestClient
+with the LLM stubbed out (OPENAI_API_KEY is cleared, so every agent answers
+in demo mode), sweeping store sizes and concurrency levels. Each store size
+runs in its own subprocess against a freshly seeded throwaway SQLite store,
+so peak RSS is measured per size and never touches real history.
+
+For every (scenario, store size, concurrency) it reports throughput, p50/p95/p99
+latency and peak RSS, and writes the results as JSON:
+
+    python -m benchmarks.api                                  # 1k..1M records, 1/4/16 clients
+    python -m benchmarks.api --sizes 1000,10000 --concurrency 1,8 --output bench.json
+
+Pass a previous result file as --baseline to gate a release on it: the run
+exits 1 when any p95 latency or peak RSS grows, or any throughput drops, by
+more than --threshold (default 0.2, i.e. 20%).
+
+Scenarios:
+    context.query   GET /context?query=...   hybrid retrieval + (stubbed) rerank
+    context.list    GET /context?limit=50    filtered listing straight from SQLite
+    events.submit   POST /events             time to accept an event
+    events.process  submit to stored         end-to-end ingest, one sample per event
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+
+DEFAULT_SIZES = "1000,10000,100000,1000000"
+DEFAULT_CONCURRENCY = "1,4,16"
+# Lower is better for these metrics, higher for throughput
+LOWER_IS_BETTER = ("p95_ms", "peak_rss_mb")
+
+WORDS = """
+    cache redis postgres pgvector sqlite index query latency throughput queue worker retry
+    batch stream cursor token budget embedding vector search rank fusion schema migration
+    auth session webhook hook commit diff branch merge deploy docker kubernetes timeout
+    pool connection lock thread async event ingest spool backfill metrics trace span
+""".split()
+QUERIES = [
+    "why did we move caching to redis", "vector search too slow", "connection pool timeout",
+    "retry webhook delivery", "schema migration for embeddings", "async ingest queue workers",
+    "token budget for session context", "postgres full text search", "docker deploy failure",
+    "trace span export",
+]
+
+
+def _sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def synthetic_rows(count: int, seed: int = 0, now: Optional[float] = None):
+    """(type, content, repo, event_id, created_at) rows shaped like distilled records."""
+    rng = random.Random(seed)
+    now = time.time() if now is None else now
+    for i in range(count):
+        created_at = now - rng.random() * 365 * 86400
+        repo = f"git@example.com:org/service-{i % 20}.git"
+        if rng.random() < 0.3:
+            content = (f"Approach: {_sentence(rng, 6)}\nReason: {_sentence(rng, 12)}\n"
+                       f"Alternative: {_sentence(rng, 8)}")
+            yield "DEAD_END", content, repo, "", created_at
+        else:
+            content = (f"Title: {_sentence(rng, 5)}\nDecision: Accepted\nStatus: Active\n"
+                       f"Reason: {_sentence(rng, 20)}")
+            yield "ADR", content, repo, "", created_at
+
+
+def seed_store(path: str, count: int, seed: int = 0):
+    """Write count synthetic records straight into a new store, without loading them."""
+    from tracecontext.orchestrator.store import SCHEMA
+
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    with conn:
+        conn.executemany(
+            "INSERT INTO records (type, content, repo, event_id, created_at) VALUES (?, ?, ?, ?, ?)",
+            synthetic_rows(count, seed),
+        )
+    conn.close()
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(latencies: list[float], wall: float, errors: int = 0) -> dict:
+    """Throughput and latency percentiles (ms) of one load run."""
+    ms = np.asarray(latencies, dtype=np.float64) * 1000
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+        "p50_ms": round(float(np.percentile(ms, 50)), 3) if len(ms) else None,
+        "p95_ms": round(float(np.percentile(ms, 95)), 3) if len(ms) else None,
+        "p99_ms": round(float(np.percentile(ms, 99)), 3) if len(ms) else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_load(call: Callable[[int], bool], requests: int, concurrency: int) -> tuple[list[float], float, int]:
+    """Issue requests calls from concurrency threads. Returns (latencies of successes, wall seconds, errors)."""
+    def timed(i: int):
+        start = time.perf_counter()
+        ok = call(i)
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(timed, range(requests)))
+    wall = time.perf_counter() - start
+    latencies = [t for t, ok in outcomes if ok]
+    return latencies, wall, len(outcomes) - len(latencies)
+
+
+def _event(i: int) -> dict:
+    return {
+        "type": "git_commit",
+        "data": {
+            "message": f"bench: change {i}",
+            "diff": f"--- a/service/module_{i % 50}.py\n+++ b/service/module_{i % 50}.py\n"
+                    f"@@ -1 +1 @@\n-TIMEOUT = {i}\n+TIMEOUT = {i + 1}\n",
+        },
+        "metadata": {"repo": "git@example.com:org/bench.git", "user": "bench"},
+    }
+
+
+def bench_size(records: int, concurrency: list[int], requests: int, events: int) -> list[dict]:
+    """Run every scenario against a store of the given size. Must run in a fresh process:
+    the orchestrator reads its configuration and opens its store at import time."""
+    seed_store(os.environ["TRACECONTEXT_DB_PATH"], records)
+
+    import logging
+    from fastapi.testclient import TestClient
+    from tracecontext.orchestrator import main
+
+    logging.disable(logging.INFO)
+    start = time.perf_counter()
+    main.ensure_loaded()
+    load_seconds = round(time.perf_counter() - start, 3)
+
+    results = []
+
+    def record(scenario: str, level: int, stats: dict):
+        results.append({"scenario": scenario, "records": records, "concurrency": level,
+                        "load_seconds": load_seconds, **stats})
+
+    with TestClient(main.app) as client:
+        def context_query(i: int) -> bool:
+            return client.get("/context", params={"query": QUERIES[i % len(QUERIES)], "limit": 10}).status_code == 200
+
+        def context_list(i: int) -> bool:
+            return client.get("/context", params={"limit": 50}).status_code == 200
+
+        event_ids: list[str] = []
+
+        def submit(i: int) -> bool:
+            r = client.post("/events", json=_event(i))
+            if r.status_code != 202:
+                return False
+            event_ids.append(r.json()["event_id"])
+            return True
+
+        # Warm up imports, connections and code paths outside the measured runs
+        context_query(0), context_list(0)
+
+        for level in concurrency:
+            record("context.query", level, summarize(*run_load(context_query, requests, level)))
+            record("context.list", level, summarize(*run_load(context_list, requests, level)))
+
+            event_ids.clear()
+            start = time.perf_counter()
+            latencies, wall, errors = run_load(submit, events, level)
+            record("events.submit", level, summarize(latencies, wall, errors))
+            main.ingest_queue.join()
+            drained = time.perf_counter() - start
+            statuses = [main.ingest_queue.status(e) for e in event_ids]
+            done = [s for s in statuses if s and s["status"] == "done"]
+            failed = len(statuses) - len(done)
+            record("events.process", level, summarize(
+                [s["completed_at"] - s["submitted_at"] for s in done], drained, errors + failed,
+            ))
+    return results
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    """Regressions of results against baseline beyond threshold (a fraction), as messages.
+
+    Rows are matched on (scenario, records, concurrency); rows missing from
+    either side are ignored.
+    """
+    previous = {(b["scenario"], b["records"], b["concurrency"]): b for b in baseline}
+    regressions = []
+    for row in results:
+        base = previous.get((row["scenario"], row["records"], row["concurrency"]))
+        if base is None:
+            continue
+        label = f"{row['scenario']} records={row['records']} concurrency={row['concurrency']}"
+        for metric in (*LOWER_IS_BETTER, "throughput_rps"):
+            new, old = row.get(metric), base.get(metric)
+            if not new or not old:
+                continue
+            change = (new - old) / old
+            if metric == "throughput_rps":
+                change = -change
+            if change > threshold:
+                regressions.append(f"{label}: {metric} {old} -> {new} ({change:+.0%} worse)")
+    return regressions
+
+
+def _run_worker(records: int, args) -> list[dict]:
+    """Benchmark one store size in a subprocess on a throwaway store."""
+    tmp = tempfile.mkdtemp(prefix="tracecontext-bench-")
+    env = {
+        **os.environ,
+        # Stub the LLM: agents fall back to their demo responses without an API key
+        "OPENAI_API_KEY": "",
+        "TRACECONTEXT_DB_PATH": os.path.join(tmp, "context.db"),
+        "TRACECONTEXT_AGENT_CACHE_PATH": os.path.join(tmp, "agent_cache.db"),
+        "TRACECONTEXT_RETRIEVAL_BACKEND": "local",
+        "TRACECONTEXT_TRACE_FILE": "",
+        "TRACECONTEXT_OTLP_ENDPOINT": "",
+        "DATABASE_URL": "",
+        "REDIS_HOST": "",
+    }
+    cmd = [
+        sys.executable, "-m", "benchmarks.api", "--worker",
+        "--sizes", str(records), "--concurrency", args.concurrency,
+        "--requests", str(args.requests), "--events", str(args.events),
+    ]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if proc.returncode != 0:
+        raise RuntimeError(f"Benchmark at {records} records failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _git_sha() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _print_table(results: list[dict]):
+    header = f"{'scenario':<16}{'records':>9}{'conc':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'err':>6}{'rss MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['scenario']:<16}{r['records']:>9}{r['concurrency']:>6}{r['throughput_rps']:>10}"
+              f"{r['p50_ms'] or '-':>10}{r['p95_ms'] or '-':>10}{r['p99_ms'] or '-':>10}{r['errors']:>6}{r['peak_rss_mb']:>9}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"store sizes in records (default {DEFAULT_SIZES})")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY, help=f"client threads (default {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--requests", type=int, default=200, help="GET /context requests per run (default 200)")
+    parser.add_argument("--events", type=int, default=200, help="events posted per run (default 200)")
+    parser.add_argument("--output", default="bench_output.json", help="result file (default bench_output.json)")
+    parser.add_argument("--baseline", help="earlier result file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed regression as a fraction (default 0.2)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    concurrency = [int(c) for c in args.concurrency.split(",") if c]
+    if args.worker:
+        print(json.dumps(bench_size(sizes[0], concurrency, args.requests, args.events)))
+        return 0
+
+    results = []
+    for records in sizes:
+        print(f"Benchmarking {records} records...", file=sys.stderr)
+        results.extend(_run_worker(records, args))
+
+    report = {
+        "meta": {
+            "created_at": time.time(),
+            "git_sha": _git_sha(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "requests": args.requests,
+            "events": args.events,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    _print_table(results)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,10 +11,10 @@ Shows developers exactly what TraceContext does:
   - MCP search_context() simulation
   - Claude Code integration preview
 """
-import sys, subprocess, time, threading, webbrowser, os
+import sys, subprocess, time, threading, webbrowser, os, tempfile
 sys.stdout.reconfigure(encoding="utf-8")
 
-from fastapi import FastAPI, Request
+from fastapi import Body, FastAPI
 from fastapi.responses import HTMLResponse, JSONResponse
 import requests as _req
 import uvicorn
@@ -39,11 +39,18 @@ async def api_status():
     return {"orchestrator": "online" if _orch_ok() else "offline"}
 
 
+# Plain def: it blocks while polling for the result, so FastAPI runs it in its threadpool
 @app.post("/api/events")
-async def fwd_events(req: Request):
+def fwd_events(event: dict = Body(...)):
     try:
-        r = _req.post(f"{ORCH}/events", json=await req.json(), timeout=90)
-        return JSONResponse(r.json())
+        r = _req.post(f"{ORCH}/events", json=event, timeout=90)
+        data = r.json()
+        # Events are processed asynchronously; wait so the demo shows the stored record
+        deadline = time.time() + 90
+        while data.get("status") in ("accepted", "queued", "processing") and time.time() < deadline:
+            time.sleep(0.5)
+            data = _req.get(f"{ORCH}/events/{data['event_id']}", timeout=5).json()
+        return JSONResponse(data)
     except Exception as e:
         return JSONResponse({"status": "error", "detail": str(e)}, status_code=503)
 
@@ -1275,10 +1282,13 @@ def _start_orchestrator():
         print("  ✓ Orchestrator already running at", ORCH)
         return
     print("  Starting orchestrator on port 8000…")
+    # A throwaway store seeded with demo records, so the demo never touches real history
+    demo_db = os.path.join(tempfile.mkdtemp(prefix="tracecontext-demo-"), "context.db")
     _proc = subprocess.Popen(
         ["python", "-m", "uvicorn", "tracecontext.orchestrator.main:app",
          "--host", "0.0.0.0", "--port", "8000", "--log-level", "warning"],
         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        env={**os.environ, "TRACECONTEXT_DB_PATH": demo_db, "TRACECONTEXT_SEED_DEMO": "1"},
     )
     for i in range(25):
         time.sleep(1)
@@ -1,11 +1,13 @@
-import sys, subprocess, time, requests, json
+import sys, subprocess, time, requests, json, os, tempfile
 sys.stdout.reconfigure(encoding='utf-8')
 
-# Start fresh server
+# Start fresh server on a throwaway store so the demo never touches real history
+demo_db = os.path.join(tempfile.mkdtemp(prefix="tracecontext-demo-"), "context.db")
 proc = subprocess.Popen(
     ["python", "-m", "uvicorn", "tracecontext.orchestrator.main:app",
      "--host", "0.0.0.0", "--port", "8000", "--log-level", "warning"],
-    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    env={**os.environ, "TRACECONTEXT_DB_PATH": demo_db, "TRACECONTEXT_SEED_DEMO": "1"},
 )
 B = "http://localhost:8000"
 for i in range(20):
@@ -20,6 +22,17 @@ for i in range(20):
 SEP  = "=" * 62
 SEP2 = "-" * 62
 
+
+def wait_for(event_id, timeout=90):
+    """Poll the orchestrator until a queued event has been processed."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = requests.get(f"{B}/events/{event_id}", timeout=5).json().get("status")
+        if status in ("done", "failed"):
+            return status
+        time.sleep(0.5)
+    return "timeout"
+
 # ── Health check ────────────────────────────────────────────────
 print()
 print(SEP)
@@ -94,6 +107,7 @@ commits = [
 for c in commits:
     r = requests.post(f"{B}/events", json=c, timeout=90)
     resp = r.json()
+    resp["status"] = wait_for(resp["event_id"])
     msg = c["data"]["message"][:55]
     print(f"  [{resp.get('status','?'):8}]  {msg}...")
 
@@ -126,6 +140,7 @@ dead_ends = [
 for de in dead_ends:
     r = requests.post(f"{B}/events", json=de, timeout=90)
     resp = r.json()
+    resp["status"] = wait_for(resp["event_id"])
     approach = de["data"]["approach"][:50]
     print(f"  [{resp.get('status','?'):8}]  Dead-end: {approach}...")
 
@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# Keep the durable store and agent cache out of the developer's home directory
+_tmp = tempfile.mkdtemp(prefix="tracecontext-tests-")
+os.environ.setdefault("TRACECONTEXT_DB_PATH", os.path.join(_tmp, "context.db"))
+os.environ.setdefault("TRACECONTEXT_AGENT_CACHE_PATH", os.path.join(_tmp, "agent_cache.db"))
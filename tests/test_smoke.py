@@ -2,6 +2,11 @@
 Smoke tests for TraceContext — verify core components import and
 run correctly with no external dependencies (no API key, no DB, no Redis).
 """
+import os
+import gzip
+import json
+import shutil
+import subprocess
 import pytest
 from unittest.mock import patch
 from fastapi.testclient import TestClient
@@ -57,6 +62,408 @@ def test_ranker_fallback_no_api_key():
     assert all(0.0 <= s.relevance_score <= 1.0 for s in result.scores)
 
 
+def test_agents_share_one_llm_client():
+    with patch.dict("os.environ", {"OPENAI_API_KEY": "sk-test"}):
+        from tracecontext.agents.distiller import ArchitectureDistiller
+        from tracecontext.agents.dead_end import DeadEndTracker
+        distiller, tracker = ArchitectureDistiller(), DeadEndTracker()
+    assert distiller.llm is not None
+    assert distiller.llm is tracker.llm
+    assert distiller.chain is not None
+
+
+def test_distiller_cache_skips_llm_for_rebased_diff(tmp_path):
+    from unittest.mock import MagicMock
+    from tracecontext.agents.cache import ResultCache
+    from tracecontext.agents.distiller import ArchitectureDistiller, ADRModel
+    agent = ArchitectureDistiller(cache=ResultCache(path=str(tmp_path / "cache.db"), max_entries=2))
+    agent.llm = agent.chain = MagicMock()
+    agent.chain.invoke.return_value = ADRModel(
+        title="Use Redis", status="Accepted", context="c", decision="d", consequences="q",
+    )
+    diff = "diff --git a/x.py b/x.py\nindex 1a2b3c4..5d6e7f8 100644\n@@ -1,2 +1,3 @@\n+import redis\n"
+    rebased = diff.replace("1a2b3c4..5d6e7f8", "9999999..8888888").replace("-1,2 +1,3", "-10,2 +10,3")
+    first = agent.distill(diff=diff, commit_msg="feat: redis")
+    second = agent.distill(diff=rebased, commit_msg="feat: redis\n\n(cherry picked from commit abc123)")
+    assert agent.chain.invoke.call_count == 1
+    assert second == first
+    agent.distill(diff="+other", commit_msg="a")
+    agent.distill(diff="+another", commit_msg="b")
+    assert len(agent.cache) == 2
+
+
+def test_agent_cache_path_expands_home(tmp_path, monkeypatch):
+    from tracecontext.agents.cache import ResultCache
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("TRACECONTEXT_AGENT_CACHE_PATH", "~/agent_cache.db")
+    assert ResultCache().path == str(tmp_path / "agent_cache.db")
+    assert ResultCache(path="~/other.db").path == str(tmp_path / "other.db")
+
+
+def test_split_diff_respects_token_budget():
+    from tracecontext.agents.chunking import estimate_tokens, split_diff
+    diff = "".join(
+        f"diff --git a/f{i}.py b/f{i}.py\n--- a/f{i}.py\n+++ b/f{i}.py\n@@ -1 +1,200 @@\n"
+        + "".join(f"+value_{j} = {j}\n" for j in range(200))
+        for i in range(3)
+    )
+    pieces = list(split_diff(diff, max_tokens=300))
+    assert len(pieces) > 3
+    assert all(estimate_tokens(p) <= 300 for p in pieces)
+    assert all(p.startswith("diff --git") for p in pieces)
+
+
+def test_distiller_map_reduces_large_diff():
+    from unittest.mock import MagicMock
+    from tracecontext.agents.distiller import ArchitectureDistiller, ADRModel, ChunkSummary
+    agent = ArchitectureDistiller()
+    agent.llm = agent.chain = MagicMock()
+    agent.summary_chain, agent.reduce_chain = MagicMock(), MagicMock()
+    agent.max_diff_tokens = 200
+    agent.summary_chain.batch.side_effect = lambda inputs, **kw: [ChunkSummary(summary="s")] * len(inputs)
+    agent.reduce_chain.invoke.return_value = ADRModel(
+        title="Big migration", status="Accepted", context="c", decision="d", consequences="q",
+    )
+    diff = "".join(f"diff --git a/m{i}.sql b/m{i}.sql\n" + "+ALTER TABLE t ADD c int;\n" * 40 for i in range(5))
+    result = agent.distill(diff=diff, commit_msg="chore: migrate schema")
+    assert result.title == "Big migration"
+    agent.chain.invoke.assert_not_called()
+    assert len(agent.summary_chain.batch.call_args.args[0]) >= 5
+
+
+def test_distill_batcher_groups_concurrent_commits():
+    import threading
+    from unittest.mock import MagicMock
+    from tracecontext.agents.batcher import DistillBatcher
+    from tracecontext.agents.distiller import ArchitectureDistiller, ADRBatch, ADRModel
+    from tracecontext.tracing import tracer
+
+    def adr(title):
+        return ADRModel(title=title, status="Accepted", context="c", decision="d", consequences="q")
+
+    agent = ArchitectureDistiller()
+    agent.llm = agent.chain = MagicMock()
+    agent.batch_chain = MagicMock()
+    agent.batch_chain.invoke.return_value = ADRBatch(adrs=[adr("one"), adr("two"), adr("three")])
+    batcher = DistillBatcher(agent, window_ms=500, max_batch=3)
+
+    results = {}
+
+    def distill(m):
+        # Each caller is part of its own event trace
+        tracer.start_trace(f"batch-{m}", "event")
+        with tracer.activate(f"batch-{m}"):
+            results[m] = batcher.distill(diff=f"+{m}", commit_msg=m)
+
+    threads = [threading.Thread(target=distill, args=(m,)) for m in ("one", "two", "three")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+    assert agent.batch_chain.invoke.call_count == 1
+    assert sorted(r.title for r in results.values()) == ["one", "three", "two"]
+    for m in ("one", "two", "three"):
+        [span] = [s for s in tracer.get(f"batch-{m}") if s.name == "llm.distiller"]
+        assert span.attributes["batch_size"] == 3
+    agent.chain.invoke.assert_not_called()
+
+    # A batch that does not return one ADR per commit falls back to per-commit calls
+    agent.batch_chain.invoke.return_value = ADRBatch(adrs=[adr("only one")])
+    agent.chain.invoke.return_value = adr("single")
+    assert [r.title for r in agent.distill_batch([("+a", "a"), ("+b", "b")])] == ["single", "single"]
+
+
+def test_distill_batcher_sends_next_batch_while_one_is_in_flight():
+    import time
+    import uuid
+    import threading
+    from unittest.mock import MagicMock
+    from tracecontext.agents.batcher import DistillBatcher
+    from tracecontext.agents.distiller import ArchitectureDistiller, ADRModel
+
+    adr = ADRModel(title="t", status="Accepted", context="c", decision="d", consequences="q")
+    agent = ArchitectureDistiller()
+    agent.llm = agent.batch_chain = MagicMock()
+    agent.chain = MagicMock()
+    release, calls = threading.Event(), []
+
+    def invoke(inputs, **kwargs):
+        calls.append(inputs)
+        if len(calls) == 1:
+            release.wait(5)
+        return adr
+
+    # Each window holds one commit, which distill_batch sends as a single distill call
+    agent.chain.invoke.side_effect = invoke
+    batcher = DistillBatcher(agent, window_ms=20, max_batch=2)
+    nonce = uuid.uuid4().hex  # unique diffs, so the shared agent cache never answers
+    first = threading.Thread(target=batcher.distill, kwargs={"diff": f"+a {nonce}", "commit_msg": "a"})
+    first.start()
+    deadline = time.monotonic() + 5
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert calls, "first batch was never sent"
+    # The first batch is still in flight; the next one must not wait for it
+    assert batcher.distill(diff=f"+b {nonce}", commit_msg="b").title == "t"
+    assert not release.is_set()
+    release.set()
+    first.join(timeout=5)
+    assert not first.is_alive()
+    assert len(calls) == 2
+
+
+def test_distill_batcher_resolves_callers_when_the_batch_fails():
+    from unittest.mock import MagicMock, patch
+    from tracecontext.agents.batcher import DistillBatcher
+    from tracecontext.agents.distiller import ArchitectureDistiller
+
+    agent = ArchitectureDistiller()
+    agent.llm = MagicMock()
+    agent.distill_batch = MagicMock(side_effect=RuntimeError("boom"))
+    batcher = DistillBatcher(agent, window_ms=20, max_batch=2)
+    with pytest.raises(RuntimeError, match="boom"):
+        batcher.distill(diff="+a", commit_msg="a")
+
+    # Nor when recording the callers' spans fails
+    agent.distill_batch = MagicMock(return_value=["adr"])
+    with patch("tracecontext.agents.batcher.tracer.add_current_span", side_effect=RuntimeError("trace")):
+        assert batcher.distill(diff="+b", commit_msg="b") == "adr"
+
+
+# ── Retrieval ────────────────────────────────────────────────────────────────
+
+def test_bm25_index_ranks_by_term_relevance():
+    from tracecontext.retrieval.bm25 import BM25Index
+    index = BM25Index()
+    index.add(0, "Use Redis for caching session data")
+    index.add(1, "Avoid float for money; use integer cents")
+    index.add(2, "Redis cluster replaced by Redis sentinel for caching")
+    results = index.search("redis caching")
+    assert [doc_id for doc_id, _ in results] == [2, 0]
+    assert index.search("postgres") == []
+    index.clear()
+    assert len(index) == 0
+    assert index.search("redis") == []
+
+
+def test_vector_index_finds_semantically_related_records():
+    from tracecontext.retrieval.embeddings import HashingEmbedder
+    from tracecontext.retrieval.vector import VectorIndex
+    embedder = HashingEmbedder(dim=256)
+    records = [
+        "[ADR] Title: Use Redis for Caching",
+        "[DEAD_END] Approach: float for monetary values\nReason: rounding errors",
+        "[ADR] Title: Adopt Kafka for event streaming",
+    ]
+    index = VectorIndex(embedder.dim, capacity=2)
+    index.add([10, 11, 12], embedder.embed(records))
+    assert len(index) == 3
+    assert index.search(embedder.embed_one("money rounding"), k=1)[0][0] == 11
+    batch = index.search_batch(embedder.embed(["event streams", "redis cache"]), k=1)
+    assert [hits[0][0] for hits in batch] == [12, 10]
+
+
+def test_ranker_cache_skips_llm_for_repeated_query():
+    from unittest.mock import MagicMock
+    from tracecontext.agents.ranker import ContextRanker, ContextScore, RankingResult
+    from tracecontext.retrieval.cache import TTLCache
+    ranker = ContextRanker(cache=TTLCache(max_entries=8, ttl=60))
+    ranker.llm = ranker.chain = MagicMock()
+    result = RankingResult(scores=[ContextScore(id="1", relevance_score=0.7, reasoning="ok")])
+    ranker.chain.invoke.return_value = result
+    chunks = [{"id": "1", "content": "Use Redis for caching"}]
+    assert ranker.rank("Redis  caching", chunks) is result
+    assert ranker.rank("redis caching", chunks) is result
+    assert ranker.chain.invoke.call_count == 1
+    ranker.rank("redis caching", chunks + [{"id": "2", "content": "new record"}])
+    assert ranker.chain.invoke.call_count == 2
+
+
+# ── Storage ──────────────────────────────────────────────────────────────────
+
+def test_context_store_persists_across_restarts(tmp_path):
+    from tracecontext.orchestrator.store import ContextStore
+    path = str(tmp_path / "context.db")
+    store = ContextStore(path)
+    assert len(store) == 0 and store.created
+    store.append([{"type": "ADR", "content": "Use Stripe"}], repo="payments", event_id="e1")
+    store.append([{"type": "DEAD_END", "content": "Braintree"}], repo="payments")
+    store.append([{"type": "ADR", "content": "Use Kafka"}], repo="events")
+
+    reopened = ContextStore(path)
+    assert [r.text for r in reopened.records()] == ["[ADR] Use Stripe", "[DEAD_END] Braintree", "[ADR] Use Kafka"]
+    assert not reopened.created
+    assert [r.content for r in reopened.query(type="ADR")] == ["Use Stripe", "Use Kafka"]
+    assert [r.content for r in reopened.query(repo="payments", type="DEAD_END")] == ["Braintree"]
+    assert reopened.query(since=reopened.records()[-1].created_at + 1) == []
+    reopened.clear()
+    assert len(ContextStore(path)) == 0
+
+
+def test_record_vectors_are_saved_and_read_back_on_restart(tmp_path):
+    import numpy as np
+    import tracecontext.orchestrator.main as main
+    from tracecontext.orchestrator.store import ContextStore
+    path = str(tmp_path / "context.db")
+    store = ContextStore(path)
+    store.append([{"type": "ADR", "content": f"Title: Record {i}"} for i in range(3)])
+    with patch.object(main, "store", store):
+        first = main._embeddings(store.records())
+
+    reopened = ContextStore(path)
+    reopened.append([{"type": "ADR", "content": "Title: Added later"}])
+    with patch.object(main, "store", reopened), patch.object(main.embedder, "embed", wraps=main.embedder.embed) as embed:
+        again = main._embeddings(reopened.records()[::-1])
+    # Only the record without a saved vector is embedded
+    embed.assert_called_once_with(["[ADR] Title: Added later"])
+    assert np.allclose(again[:0:-1], first)
+    ids, _ = ContextStore(path).vectors(main.embedder.key, main.embedder.dim, [1, 2, 3, 4])
+    assert sorted(ids.tolist()) == [1, 2, 3, 4]
+
+
+def test_demo_records_seed_only_when_requested(tmp_path):
+    import tracecontext.orchestrator.main as main
+    from tracecontext.orchestrator.store import ContextStore
+    for seed, expected in ((False, 0), (True, len(main.SEED_RECORDS))):
+        new_store = ContextStore(str(tmp_path / f"context-{seed}.db"))
+        with patch.object(main, "store", new_store), patch.object(main, "_loaded", False), \
+                patch.object(main, "SEED_DEMO", seed):
+            main.ensure_loaded()
+        assert len(new_store) == expected
+
+
+def test_database_manager_bulk_insert_uses_pooled_connection():
+    import threading
+    from unittest.mock import MagicMock
+    from tracecontext.orchestrator.db import DatabaseManager
+    with patch.object(DatabaseManager, "_init_pg"), patch.object(DatabaseManager, "_init_redis"):
+        db = DatabaseManager()
+    assert db.store_adrs([{"title": "t", "content": "c"}]) == 0
+
+    db.pg_pool, db._pg_slots = MagicMock(), threading.BoundedSemaphore(2)
+    conn = db.pg_pool.getconn.return_value
+    with patch("psycopg2.extras.execute_values") as execute_values:
+        written = db.store_adrs([{"title": f"ADR {i}", "content": "c", "repo": "r"} for i in range(50)])
+    assert written == 50
+    assert execute_values.call_count == 1
+    assert len(execute_values.call_args.args[2]) == 50
+    conn.commit.assert_called_once()
+    db.pg_pool.putconn.assert_called_once_with(conn)
+
+
+def test_postgres_queries_parse():
+    pglast = pytest.importorskip("pglast")
+    import threading
+    from unittest.mock import MagicMock
+    from tracecontext.orchestrator import db as db_module
+    from tracecontext.orchestrator.db import DatabaseManager
+
+    def literal(value):
+        return str(value) if isinstance(value, (int, float)) else "'" + str(value).replace("'", "''") + "'"
+
+    with patch.object(DatabaseManager, "_init_pg"), patch.object(DatabaseManager, "_init_redis"):
+        db = DatabaseManager()
+    db.pg_pool, db._pg_slots, db.vector_enabled = MagicMock(), threading.BoundedSemaphore(1), True
+    cur = db.pg_pool.getconn.return_value.cursor.return_value.__enter__.return_value
+    cur.fetchall.return_value = []
+    db.search_text("why redis", limit=5, offset=10)
+    db.search_similar([0.1, 0.2], k=5, offset=10)
+    db.record_ids("store-uid")
+    db.clear()
+
+    statements = [db_module.SCHEMA, db_module.VECTOR_SCHEMA.format(dim=384), *db_module.VECTOR_INDEXES.values()]
+    for call in cur.execute.call_args_list:
+        sql, params = call.args[0], call.args[1] if len(call.args) > 1 else ()
+        statements.append(sql % tuple(literal(p) for p in params))
+    for sql in statements:
+        pglast.parse_sql(sql)
+
+
+def test_semantic_search_served_from_pgvector(client):
+    from unittest.mock import MagicMock
+    import tracecontext.orchestrator.main as main
+    client.post("/reset")
+    pg = MagicMock(pg_pool=None, vector_enabled=True)
+    pg.search_similar.return_value = [{
+        "id": 1, "record_id": 987654, "record_type": "ADR", "content": "Title: Only in Postgres",
+        "repo": "r", "created_at": 0.0, "score": 0.9,
+    }]
+    with patch.object(main, "db", pg), patch.object(main, "RETRIEVAL_BACKEND", "postgres"):
+        records = main.retrieve_candidates("zzzz unmatched", 5)
+    assert [r.text for r in records] == ["[ADR] Title: Only in Postgres"]
+    assert pg.search_similar.call_args.args[1] == 5
+
+
+def test_keyword_search_served_from_postgres_full_text(client):
+    from unittest.mock import MagicMock
+    import tracecontext.orchestrator.main as main
+    client.post("/reset")
+    pg = MagicMock(vector_enabled=False)
+    pg.search_text.return_value = [{
+        "id": 7, "record_id": 424242, "origin": "other-store", "record_type": "DEAD_END", "content": "Approach: Braintree",
+        "repo": "", "created_at": 0.0, "score": 0.1,
+    }]
+    with patch.object(main, "db", pg), patch.object(main, "RETRIEVAL_BACKEND", "postgres"):
+        records = main.retrieve_candidates("braintree", 3)
+    assert [r.id for r in records] == [424242]
+    pg.search_text.assert_called_once_with("braintree", limit=3, offset=0)
+
+
+def test_postgres_search_failure_falls_back_to_local_indexes(client):
+    import psycopg2
+    from unittest.mock import MagicMock
+    import tracecontext.orchestrator.main as main
+    from tracecontext.retrieval.bm25 import BM25Index
+    from tracecontext.retrieval.vector import VectorIndex
+    client.post("/reset")
+    main.append_records([{"type": "DEAD_END", "content": "Approach: Braintree checkout"}])
+    pg = MagicMock(vector_enabled=True)
+    pg.search_text.side_effect = psycopg2.OperationalError("server closed the connection")
+    # With the postgres backend the in-process indexes are only built once a search fails
+    with patch.object(main, "db", pg), patch.object(main, "RETRIEVAL_BACKEND", "postgres"), \
+            patch.object(main, "search_index", BM25Index()), patch.object(main, "_local_keyword", False), \
+            patch.object(main, "vector_index", VectorIndex(main.embedder.dim)), patch.object(main, "_local_vectors", False):
+        records = main.retrieve_candidates("braintree", 3)
+        assert main._local_keyword and main._local_vectors
+        r = client.get("/context", params={"query": "braintree"})
+    assert records[0].text == "[DEAD_END] Approach: Braintree checkout"
+    assert r.status_code == 200
+
+
+def test_postgres_rows_from_other_orchestrators_keep_their_origin(client):
+    from unittest.mock import MagicMock
+    import tracecontext.orchestrator.main as main
+    client.post("/reset")
+    local = main.append_records([{"type": "ADR", "content": "Title: Local payments record"}])[0]
+    pg = MagicMock(vector_enabled=False)
+    pg.search_text.return_value = [
+        {"id": 1, "record_id": local.id, "origin": main.store.uid, "record_type": "ADR",
+         "content": "Title: Local payments record", "repo": "", "created_at": 0.0, "score": 0.2},
+        {"id": 2, "record_id": local.id, "origin": "other-store", "record_type": "ADR",
+         "content": "Title: Remote payments record", "repo": "", "created_at": 0.0, "score": 0.1},
+    ]
+    with patch.object(main, "db", pg), patch.object(main, "RETRIEVAL_BACKEND", "postgres"):
+        records = main.retrieve_candidates("payments", 5)
+    assert [(r.origin, r.text) for r in records] == [
+        ("", "[ADR] Title: Local payments record"), ("other-store", "[ADR] Title: Remote payments record"),
+    ]
+
+
+def test_records_missing_from_postgres_are_copied_on_load(client):
+    from unittest.mock import MagicMock
+    import tracecontext.orchestrator.main as main
+    client.post("/reset")
+    records = main.append_records([{"type": "ADR", "content": f"Title: History {i}"} for i in range(3)])
+    pg = MagicMock()
+    pg.record_ids.return_value = {records[0].id}
+    with patch.object(main, "db", pg):
+        main._sync_to_postgres(main.store.records())
+    pg.record_ids.assert_called_once_with(main.store.uid)
+    copied = pg.store_adrs.call_args.args[0]
+    assert [row["record_id"] for row in copied] == [r.id for r in records[1:]]
+    assert all(row["origin"] == main.store.uid and row["embedding"] is not None for row in copied)
+
+
 # ── Orchestrator API ─────────────────────────────────────────────────────────
 
 @pytest.fixture
@@ -78,8 +485,8 @@ def test_post_git_commit_event(client):
         "metadata": {"repo": "test-repo", "user": "tester"},
     }
     r = client.post("/events", json=payload)
-    assert r.status_code == 200
-    assert r.json()["status"] == "received"
+    assert r.status_code == 202
+    assert r.json()["status"] == "accepted"
     assert "event_id" in r.json()
 
 
@@ -90,8 +497,75 @@ def test_post_revert_event(client):
         "metadata": {},
     }
     r = client.post("/events", json=payload)
+    assert r.status_code == 202
+    assert r.json()["status"] == "accepted"
+
+
+def test_event_status_reports_completion(client):
+    from tracecontext.orchestrator.main import ingest_queue
+    payload = {
+        "type": "git_commit",
+        "data": {"message": "feat: queued commit", "diff": "+y = 2"},
+        "metadata": {},
+    }
+    event_id = client.post("/events", json=payload).json()["event_id"]
+    ingest_queue.join()
+    r = client.get(f"/events/{event_id}")
     assert r.status_code == 200
-    assert r.json()["status"] == "received"
+    assert r.json()["status"] == "done"
+    assert r.json()["records"] == 1
+
+
+def test_post_event_batch_gzip(client):
+    events = [
+        {"type": "git_commit", "data": {"message": f"feat: batch {i}", "diff": "+x"}, "metadata": {"repo": "r"}}
+        for i in range(3)
+    ]
+    r = client.post(
+        "/events/batch",
+        content=gzip.compress(json.dumps(events).encode()),
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+    assert r.status_code == 202
+    results = r.json()["events"]
+    assert [res["status"] for res in results] == ["accepted"] * 3
+    assert len({res["event_id"] for res in results}) == 3
+
+    bad = client.post("/events/batch", json=[{"type": "git_commit"}])
+    assert bad.status_code == 422
+
+    truncated = client.post("/events/batch", content=gzip.compress(b"[]")[:-4], headers={"Content-Encoding": "gzip"})
+    assert truncated.status_code == 400
+
+
+def test_post_event_batch_caps_decompressed_size(client):
+    import tracecontext.orchestrator.main as main
+    # 64 KiB of whitespace compresses to a few hundred bytes
+    bomb = gzip.compress(b"[" + b" " * 65536 + b"]")
+    with patch.object(main, "EVENTS_BATCH_MAX_BYTES", 4096):
+        r = client.post("/events/batch", content=bomb, headers={"Content-Encoding": "gzip"})
+        plain = client.post("/events/batch", content=b"[" + b" " * 8192 + b"]")
+    assert len(bomb) < 4096
+    assert r.status_code == 413 and plain.status_code == 413
+    assert client.post("/events/batch", content=bomb, headers={"Content-Encoding": "gzip"}).status_code == 202
+
+
+def test_event_status_unknown_id(client):
+    r = client.get("/events/does-not-exist")
+    assert r.status_code == 404
+
+
+def test_store_loads_in_background_on_startup():
+    import threading
+    from fastapi.testclient import TestClient
+    import tracecontext.orchestrator.main as main
+    started = threading.Event()
+    with patch.object(main, "ensure_loaded", side_effect=lambda: started.wait(5)) as ensure_loaded:
+        with TestClient(main.app) as c:
+            assert c.get("/").status_code == 200
+            assert c.get("/metrics").status_code == 200
+            started.set()
+    ensure_loaded.assert_called_once()
 
 
 def test_get_context_no_query(client):
@@ -109,13 +583,301 @@ def test_get_context_with_query(client):
     assert data["query"] == "Redis"
 
 
+def test_get_context_caps_rerank_candidates(client):
+    from tracecontext.orchestrator import main
+    from tracecontext.agents.ranker import RankingResult
+    main.append_records([{"type": "ADR", "content": f"Title: Unrelated decision {i}"} for i in range(10)])
+    with patch.object(main, "RERANK_TOP_K", 3), patch.object(main, "ranker") as ranker:
+        ranker.rank.return_value = RankingResult(scores=[])
+        r = client.get("/context", params={"query": "zzzz", "limit": 2})
+        chunks = ranker.rank.call_args.kwargs["context_chunks"]
+    assert len(chunks) == 3
+    assert len(r.json()["context"]) == 2
+
+
+def test_get_context_query_pages_with_cursor(client):
+    import tracecontext.orchestrator.main as main
+    client.post("/reset")
+    main.append_records([{"type": "ADR", "content": f"Title: Ledger shard {i}"} for i in range(5)])
+    # The first page is requested without a cursor and tells the client where the next one starts
+    seen, cursor, pages = set(), None, 0
+    while pages == 0 or cursor is not None:
+        params = {"query": "ledger", "limit": 2, **({"cursor": cursor} if cursor is not None else {})}
+        body = client.get("/context", params=params).json()
+        assert len(body["context"]) <= 2
+        seen.update(body["context"])
+        cursor, pages = body["next_cursor"], pages + 1
+    assert seen == {f"[ADR] Title: Ledger shard {i}" for i in range(5)}
+    assert pages >= 3
+
+
+def test_get_context_cursor_pagination_and_ndjson_stream(client):
+    import json
+    import tracecontext.orchestrator.main as main
+    client.post("/reset")
+    main.append_records([{"type": "ADR", "content": f"Title: Page {i}"} for i in range(5)])
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor is not None else {})}
+        body = client.get("/context", params=params).json()
+        pages.append(body["context"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert [len(p) for p in pages] == [2, 2, 1]
+    assert sum(pages, []) == [f"[ADR] Title: Page {i}" for i in range(5)]
+
+    with patch.object(main, "STREAM_PAGE_SIZE", 2):
+        r = client.get("/context", params={"format": "ndjson", "limit": 3})
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [line["content"] for line in lines] == ["Title: Page 0", "Title: Page 1", "Title: Page 2"]
+
+
+def test_get_context_conditional_get(client):
+    import tracecontext.orchestrator.main as main
+    first = client.get("/context")
+    etag = first.headers["etag"]
+    assert client.get("/context", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/context", params={"limit": 1}, headers={"If-None-Match": etag}).status_code == 200
+
+    main.append_records([{"type": "ADR", "content": "Title: Changed"}])
+    changed = client.get("/context", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_active_context_packs_records_into_token_budget(client):
+    import tracecontext.orchestrator.main as main
+    client.post("/reset")
+    main.append_records([{"type": "ADR", "content": "Title: Old decision " + "x" * 400}], repo="other")
+    main.append_records([{"type": "DEAD_END", "content": "Approach: polling in payments/worker.py"}], repo="svc")
+    main.append_records([{"type": "ADR", "content": "Title: Use queues"}], repo="svc")
+
+    body = client.get("/context/active", params={"budget": 40, "repo": "svc", "path": "payments/worker.py"}).json()
+    assert body["context"] == ["[DEAD_END] Approach: polling in payments/worker.py", "[ADR] Title: Use queues"]
+    assert body["tokens"] <= 40
+    assert body["omitted"] == 1
+
+
+class FakeRedis:
+    """Just enough of the redis-py client for ResponseCache."""
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if not (nx and key in self.data):
+            self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+def test_context_responses_cached_in_redis_until_store_changes(client):
+    import tracecontext.orchestrator.main as main
+    from tracecontext.orchestrator.response_cache import ResponseCache
+    redis = FakeRedis()
+    # Replicas share cached responses only when they share the store
+    replica_a, replica_b = (ResponseCache(redis, scope=lambda: main.store.uid) for _ in range(2))
+    with patch.object(main, "response_cache", replica_a), \
+            patch.object(main, "build_context", wraps=main.build_context) as build:
+        first = client.get("/context").json()
+        assert client.get("/context").json() == first
+        assert build.call_count == 1
+
+        # A write on another replica invalidates this one's cached responses
+        with patch.object(main, "response_cache", replica_b):
+            main.append_records([{"type": "ADR", "content": "Title: Cached"}])
+        assert "[ADR] Title: Cached" in client.get("/context").json()["context"]
+        assert build.call_count == 2
+
+
+def test_response_cache_keys_are_scoped_to_the_store():
+    from tracecontext.orchestrator.response_cache import ResponseCache
+    redis = FakeRedis()
+    store_a, store_b = ResponseCache(redis, scope=lambda: "store-a"), ResponseCache(redis, scope=lambda: "store-b")
+    params = {"query": "", "limit": None}
+    version = store_a.version()
+    assert store_b.version() == version
+    assert store_a.get_or_compute(params, lambda: {"context": ["a"]}) == {"context": ["a"]}
+    # Same version and params, but another store: computed, never served from store A's entry
+    assert store_b.get_or_compute(params, lambda: {"context": ["b"]}) == {"context": ["b"]}
+    assert store_a.etag(version, params) != store_b.etag(version, params)
+    assert ResponseCache(redis, scope=lambda: "store-a").get_or_compute(params, lambda: {}) == {"context": ["a"]}
+
+
+def test_metrics_endpoint_exposes_stage_latency(client):
+    import uuid
+    from langchain_core.outputs import LLMResult
+    from tracecontext.metrics import LLM_TOKENS, llm_metrics
+    import tracecontext.orchestrator.main as main
+
+    client.post("/events", json={"type": "revert_detected", "data": {"approach": "metrics"}, "metadata": {}})
+    main.ingest_queue.join()
+    client.get("/context", params={"query": "metrics"})
+
+    run_id = uuid.uuid4()
+    llm_metrics.on_chat_model_start({}, [], run_id=run_id, metadata={"agent": "ranker"})
+    llm_metrics.on_llm_end(LLMResult(generations=[], llm_output={"token_usage": {"prompt_tokens": 12}}), run_id=run_id)
+    assert LLM_TOKENS.value(agent="ranker", kind="prompt") >= 12
+
+    body = client.get("/metrics").text
+    assert 'tracecontext_graph_node_seconds_count{node="dead_end_tracker"}' in body
+    assert 'tracecontext_context_seconds_count{stage="retrieval"}' in body
+    assert 'tracecontext_llm_call_seconds_count{agent="ranker"}' in body
+    assert "tracecontext_ingest_queue_depth 0" in body
+    assert "tracecontext_store_records " in body
+
+
+def test_event_trace_spans_client_to_store(client, tmp_path):
+    import time
+    import tracecontext.orchestrator.main as main
+    trace_file = tmp_path / "spans.jsonl"
+    committed = time.time() - 2
+    event = {
+        "type": "revert_detected",
+        "data": {"approach": "traced"},
+        "metadata": {"client_spans": [
+            {"name": "hook.spooled", "start": committed, "end": committed + 1},
+            # Open-ended, like the MCP tool spans: closed when the event arrives
+            {"name": "mcp.add_dead_end", "start": committed},
+        ]},
+    }
+    with patch.object(main.tracer, "trace_file", str(trace_file)):
+        event_id = client.post("/events", json=event).json()["event_id"]
+        main.ingest_queue.join()
+
+    trace = client.get(f"/debug/events/{event_id}/trace").json()
+    names = [span["name"] for span in trace["spans"]]
+    assert trace["complete"]
+    assert names[0] == "hook.spooled"
+    for name in ("event", "queue.wait", "graph", "node.dead_end_tracker", "node.storer", "store.append"):
+        assert name in names
+    assert trace["duration_ms"] >= 2000
+    mcp_span = next(span for span in trace["spans"] if span["name"] == "mcp.add_dead_end")
+    assert mcp_span["duration_ms"] >= 2000
+    exported = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    assert {s["trace_id"] for s in exported} == {event_id}
+    assert client.get("/debug/events/unknown/trace").status_code == 404
+
+
 def test_reset_context(client):
     r = client.post("/reset")
     assert r.status_code == 200
     assert r.json()["status"] == "ok"
 
 
-# ── MCP server — import only ─────────────────────────────────────────────────
+# ── CLI ──────────────────────────────────────────────────────────────────────
+
+@pytest.mark.skipif(shutil.which("git") is None or shutil.which("bash") is None, reason="needs git and bash")
+def test_hook_spools_commits_until_flush_succeeds(tmp_path, monkeypatch):
+    import requests
+    from unittest.mock import MagicMock
+    from click.testing import CliRunner
+    from tracecontext import cli, spool
+
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q")
+    git("-c", "user.name=t", "-c", "user.email=t@example.com", "commit", "-q", "--allow-empty", "-m", "feat: spooled")
+    monkeypatch.chdir(tmp_path)
+    assert CliRunner().invoke(cli.main, ["init"]).exit_code == 0
+
+    # Run the hook without the CLI on PATH so it only spools
+    subprocess.run(["bash", ".git/hooks/post-commit"], cwd=tmp_path, check=True,
+                   env={"PATH": os.pathsep.join([os.path.dirname(shutil.which("git")), "/usr/bin", "/bin"])})
+    directory = spool.spool_dir(str(tmp_path))
+    assert len(spool.pending(directory)) == 1
+
+    with patch("requests.Session.post", side_effect=requests.ConnectionError("down")), patch("time.sleep"):
+        assert spool.flush("http://orchestrator", cwd=str(tmp_path), retries=2) == (0, 1)
+
+    ok = MagicMock(status_code=202)
+    ok.json.return_value = {"events": [{"status": "accepted"}]}
+    with patch("requests.Session.post", return_value=ok) as post:
+        assert spool.flush("http://orchestrator", cwd=str(tmp_path)) == (1, 0)
+    assert post.call_args.args[0] == "http://orchestrator/events/batch"
+    [event] = json.loads(gzip.decompress(post.call_args.kwargs["data"]))
+    assert event["type"] == "git_commit"
+    assert event["data"]["message"] == "feat: spooled"
+    assert spool.pending(directory) == []
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+def test_backfill_resumes_from_checkpoint(tmp_path):
+    from unittest.mock import MagicMock
+    from tracecontext.backfill import backfill
+
+    def commit(message, author="dev"):
+        subprocess.run(["git", "-c", f"user.name={author}", "-c", "user.email=dev@example.com",
+                        "commit", "-q", "--allow-empty", "-m", message], cwd=tmp_path, check=True)
+
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    for i in range(3):
+        commit(f"feat: change {i}")
+    commit("chore: bump deps", author="dependabot[bot]")
+    commit("feat: change 3")
+
+    with patch("requests.Session.post", return_value=MagicMock(status_code=202)) as post:
+        assert backfill("http://orchestrator", cwd=str(tmp_path), concurrency=1, limit=2) == 2
+        assert backfill("http://orchestrator", cwd=str(tmp_path), concurrency=2, batch_size=1) == 2
+        assert backfill("http://orchestrator", cwd=str(tmp_path)) == 0
+    messages = [
+        event["data"]["message"]
+        for c in post.call_args_list
+        for event in json.loads(gzip.decompress(c.kwargs["data"]))
+    ]
+    assert sorted(messages) == [f"feat: change {i}" for i in range(4)]
+    assert messages[:2] == ["feat: change 0", "feat: change 1"]
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+def test_partially_rejected_batches_only_resend_rejected_commits(tmp_path):
+    import requests
+    from unittest.mock import MagicMock
+    from tracecontext import spool
+    from tracecontext.backfill import backfill
+
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True, text=True).stdout
+
+    git("init", "-q")
+    for i in range(2):
+        git("-c", "user.name=t", "-c", "user.email=t@example.com", "commit", "-q", "--allow-empty", "-m", f"feat: {i}")
+    shas = git("log", "--reverse", "--format=%H").split()
+    directory = spool.spool_dir(str(tmp_path))
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, spool.SPOOL_FILE), "w") as f:
+        f.writelines(f"{sha}\t0\tt\n" for sha in shas)
+
+    def reply(*statuses):
+        r = MagicMock(status_code=202)
+        r.json.return_value = {"events": [{"status": s} for s in statuses]}
+        return r
+
+    def messages(post):
+        return [e["data"]["message"] for c in post.call_args_list for e in json.loads(gzip.decompress(c.kwargs["data"]))]
+
+    with patch("requests.Session.post", side_effect=[reply("accepted", "rejected"), reply("rejected")]), \
+            patch("time.sleep"):
+        assert spool.flush("http://orchestrator", cwd=str(tmp_path), retries=2) == (1, 1)
+    assert spool.pending(directory) == [f"{shas[1]}\t0\tt"]
+
+    with patch("requests.Session.post", side_effect=[reply("rejected", "accepted"), reply("rejected")]), \
+            patch("time.sleep"), pytest.raises(requests.RequestException):
+        backfill("http://orchestrator", cwd=str(tmp_path), batch_size=2, retries=2)
+    with patch("requests.Session.post", return_value=reply("accepted")) as post:
+        assert backfill("http://orchestrator", cwd=str(tmp_path)) == 1
+    assert messages(post) == ["feat: 0"]
+
+
+# ── MCP server ───────────────────────────────────────────────────────────────
 
 def test_mcp_server_imports():
     from tracecontext.mcp_server import mcp, search_context, add_decision, add_dead_end
@@ -123,3 +885,128 @@ def test_mcp_server_imports():
     assert callable(search_context)
     assert callable(add_decision)
     assert callable(add_dead_end)
+
+
+def test_mcp_tools_share_one_async_client():
+    import asyncio
+    import httpx
+    import tracecontext.mcp_server as mcp_server
+
+    seen = []
+
+    def handler(request):
+        seen.append(request.url.path)
+        if request.method == "POST":
+            [span] = json.loads(request.content)["metadata"]["client_spans"]
+            assert span["name"] == "mcp.add_dead_end" and "end" not in span
+            return httpx.Response(202, json={"status": "accepted", "event_id": "e1"})
+        return httpx.Response(200, json={"context": ["[ADR] Title: Pooled"], "query": "pooled"})
+
+    client = httpx.AsyncClient(base_url="http://orchestrator", transport=httpx.MockTransport(handler))
+
+    async def session():
+        found = await mcp_server.search_context("pooled")
+        recorded = await mcp_server.add_dead_end("polling", "too slow")
+        return found, recorded
+
+    with patch.object(mcp_server, "_client", client):
+        found, recorded = asyncio.run(session())
+        assert mcp_server._http() is client
+    assert "[ADR] Title: Pooled" in found
+    assert recorded.startswith("Dead-end recorded")
+    assert seen == ["/context", "/events"]
+
+
+def test_mcp_active_context_revalidates_with_etag():
+    import asyncio
+    import httpx
+    import tracecontext.mcp_server as mcp_server
+
+    conditional = []
+
+    def handler(request):
+        conditional.append(request.headers.get("if-none-match"))
+        assert request.url.path == "/context/active"
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json={"context": ["[ADR] Title: Cached"]}, headers={"ETag": '"v1"'})
+
+    client = httpx.AsyncClient(base_url="http://orchestrator", transport=httpx.MockTransport(handler))
+
+    async def read_twice():
+        return await mcp_server.active_context(), await mcp_server.active_context()
+
+    with patch.object(mcp_server, "_client", client), patch.object(mcp_server, "_active_context", (None, "")):
+        first, second = asyncio.run(read_twice())
+    assert first == second == "[ADR] Title: Cached"
+    assert conditional == [None, '"v1"']
+
+
+def test_mcp_embedded_mode_calls_orchestrator_in_process(client):
+    import asyncio
+    import tracecontext.mcp_server as mcp_server
+    import tracecontext.orchestrator.main as main
+    client.post("/reset")
+    main.append_records([{"type": "ADR", "content": "Title: Embedded search works"}])
+
+    async def session():
+        found = await mcp_server.search_context("embedded")
+        first = await mcp_server.active_context()
+        second = await mcp_server.active_context()
+        recorded = await mcp_server.add_decision("Embed it", "Run in-process", "Single developer")
+        return found, recorded, first, second
+
+    with patch.object(mcp_server, "EMBEDDED", True), patch.object(mcp_server, "_active_context", (None, "")), \
+            patch.object(mcp_server, "_http", side_effect=AssertionError("no HTTP in embedded mode")):
+        found, recorded, first, second = asyncio.run(session())
+        main.ingest_queue.join()
+    assert "[ADR] Title: Embedded search works" in found
+    assert recorded.startswith("Decision recorded")
+    assert first == second and "Embedded search works" in first
+
+
+# ── Benchmarks ────────────────────────────────────────────────────────────────
+
+def test_benchmark_reports_percentiles_and_flags_regressions():
+    from benchmarks.api import compare, summarize
+    stats = summarize([0.001 * i for i in range(1, 101)], wall=2.0, errors=1)
+    assert stats["requests"] == 101 and stats["throughput_rps"] == 50.0
+    assert stats["p50_ms"] < stats["p95_ms"] < stats["p99_ms"] <= 100.0
+    assert stats["peak_rss_mb"] > 0
+
+    base = [{"scenario": "context.query", "records": 1000, "concurrency": 4,
+             "throughput_rps": 100.0, "p95_ms": 10.0, "peak_rss_mb": 200.0}]
+    assert compare([{**base[0], "throughput_rps": 90.0, "p95_ms": 11.0}], base, 0.2) == []
+    regressions = compare([{**base[0], "throughput_rps": 70.0, "p95_ms": 13.0}], base, 0.2)
+    assert len(regressions) == 2
+    assert any("throughput_rps" in r for r in regressions) and any("p95_ms" in r for r in regressions)
+
+
+def test_benchmark_run_writes_results(tmp_path):
+    from benchmarks.api import main as bench
+    output = tmp_path / "bench.json"
+    assert bench(["--sizes", "200", "--concurrency", "2", "--requests", "10", "--events", "5",
+                  "--output", str(output)]) == 0
+    results = json.loads(output.read_text())["results"]
+    assert {r["scenario"] for r in results} == {"context.query", "context.list", "events.submit", "events.process"}
+    assert all(r["records"] == 200 and r["errors"] == 0 and r["p95_ms"] for r in results)
+    assert bench(["--sizes", "200", "--concurrency", "2", "--requests", "10", "--events", "5",
+                  "--output", str(tmp_path / "again.json"), "--baseline", str(output), "--threshold", "100"]) == 0
+
+
+def test_mcp_embedded_mode_keeps_stdout_clean(client, capfd):
+    # stdout carries the MCP stdio protocol; agent output must never reach it
+    import asyncio
+    import tracecontext.mcp_server as mcp_server
+    import tracecontext.orchestrator.main as main
+    capfd.readouterr()
+
+    async def session():
+        await mcp_server._post("/events", {"type": "git_commit", "data": {"message": "Embedded", "diff": "+x = 1"}})
+        await mcp_server.add_dead_end("Embedded polling", "Blocked the loop")
+        await mcp_server.add_decision("Embed it", "Run in-process", "Single developer")
+
+    with patch.object(mcp_server, "EMBEDDED", True):
+        asyncio.run(session())
+        main.ingest_queue.join()
+    assert capfd.readouterr().out == ""
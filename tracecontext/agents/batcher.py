@@ -0,0 +1,130 @@
+"""
+DistillBatcher — micro-batches concurrent distillation requests.
+
+Ingest workers that call `distill` within the same short window are grouped
+into a single structured-output request (ArchitectureDistiller.distill_batch),
+which raises throughput per rate-limit unit during merge trains and backfills.
+Each caller still blocks only until its own ADR is ready, and batches are sent
+through a small pool so a request in flight never holds up the next window.
+
+Every ingest worker waits on its own commit, so a batch can never hold more
+commits than there are workers: raise TRACECONTEXT_INGEST_WORKERS along with
+the batch size.
+
+Configure with:
+    TRACECONTEXT_DISTILL_BATCH_WINDOW_MS  collection window, 0 disables batching (default 0)
+    TRACECONTEXT_DISTILL_BATCH_SIZE       max commits per request (default 8)
+"""
+
+import os
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from .chunking import estimate_tokens
+from .distiller import ADRModel, ArchitectureDistiller
+from ..tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# (diff, commit message, caller's context, future result)
+Request = tuple[str, str, contextvars.Context, Future]
+
+
+class DistillBatcher:
+    def __init__(
+        self,
+        distiller: ArchitectureDistiller,
+        window_ms: Optional[float] = None,
+        max_batch: Optional[int] = None,
+    ):
+        self.distiller = distiller
+        if window_ms is None:
+            window_ms = float(os.getenv("TRACECONTEXT_DISTILL_BATCH_WINDOW_MS", 0))
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch or int(os.getenv("TRACECONTEXT_DISTILL_BATCH_SIZE", 8))
+        self._pending: list[Request] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        workers = int(os.getenv("TRACECONTEXT_INGEST_WORKERS", 4))
+        if self.enabled and self.max_batch > workers:
+            logger.warning(
+                f"TRACECONTEXT_DISTILL_BATCH_SIZE={self.max_batch} exceeds TRACECONTEXT_INGEST_WORKERS={workers}; "
+                f"batches will hold at most {workers} commits"
+            )
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and self.max_batch > 1
+
+    def distill(self, diff: str, commit_msg: str) -> ADRModel:
+        # Large diffs go through map-reduce on their own; demo mode has nothing to batch
+        if (
+            not self.enabled
+            or self.distiller.llm is None
+            or estimate_tokens(diff) > self.distiller.max_diff_tokens
+        ):
+            return self.distiller.distill(diff, commit_msg)
+
+        future: Future = Future()
+        with self._cond:
+            if self._thread is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.distiller.max_concurrency, thread_name_prefix="tracecontext-distill-batch",
+                )
+                self._thread = threading.Thread(target=self._run, name="tracecontext-distill-batcher", daemon=True)
+                self._thread.start()
+            # The caller's context carries its trace, so the batched LLM call shows up in it
+            self._pending.append((diff, commit_msg, contextvars.copy_context(), future))
+            self._cond.notify()
+        return future.result()
+
+    def _take_batch(self) -> list[Request]:
+        """Wait for the first request, then collect more until the window closes or a limit is hit."""
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.window
+            while len(self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch, tokens = [], 0
+            while self._pending and len(batch) < self.max_batch:
+                tokens += estimate_tokens(self._pending[0][0])
+                if batch and tokens > self.distiller.max_diff_tokens:
+                    break
+                batch.append(self._pending.pop(0))
+            return batch
+
+    def _run(self):
+        while True:
+            self._executor.submit(self._send, self._take_batch())
+
+    def _send(self, batch: list[Request]):
+        results, error = [], None
+        start = time.time()
+        try:
+            results = self.distiller.distill_batch([(diff, msg) for diff, msg, _, _ in batch])
+        except Exception as e:
+            error = e
+        finally:
+            # One shared request: each caller's trace gets its span before the caller resumes
+            end = time.time()
+            for _, _, context, _ in batch:
+                try:
+                    context.run(tracer.add_current_span, "llm.distiller", start, end, batch_size=len(batch))
+                except Exception as e:
+                    logger.warning(f"Could not record distiller batch span: {e}")
+            # Every caller is blocked on its future and holds an ingest worker: always resolve them
+            for (_, _, _, future), result in zip(batch, results):
+                future.set_result(result)
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error or RuntimeError("Batch returned too few ADRs"))
@@ -0,0 +1,118 @@
+"""
+ResultCache — persistent, size-bounded cache of agent results.
+
+Keys are content hashes of the normalized agent input, so a rebased,
+cherry-picked or amended commit that resends an already distilled diff is
+answered from disk without an LLM call. Entries live in a small SQLite file
+and the least recently used ones are evicted once the cache is full.
+
+Configure with:
+    TRACECONTEXT_AGENT_CACHE_PATH  cache file (default ~/.tracecontext/agent_cache.db)
+    TRACECONTEXT_AGENT_CACHE_SIZE  max entries, 0 disables the cache (default 10000)
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+
+_INDEX_LINE = re.compile(r"^index [0-9a-f]+\.\.[0-9a-f]+.*$", re.MULTILINE)
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+\d+(?:,\d+)? @@", re.MULTILINE)
+_CHERRY_PICK = re.compile(r"^\(cherry picked from commit [0-9a-f]+\)$", re.MULTILINE)
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(_CHERRY_PICK.sub("", text or "").split())
+
+
+def normalize_diff(diff: str) -> str:
+    """Drop blob hashes and hunk line numbers, which change on rebase without changing content."""
+    diff = _INDEX_LINE.sub("", (diff or "").replace("\r\n", "\n"))
+    diff = _HUNK_HEADER.sub("@@", diff)
+    return "\n".join(line.rstrip() for line in diff.split("\n") if line.strip())
+
+
+def content_key(kind: str, *parts: str) -> str:
+    h = hashlib.sha256(kind.encode("utf-8"))
+    for part in parts:
+        h.update(b"\0")
+        h.update(part.encode("utf-8"))
+    return h.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.path = os.path.expanduser(path or os.getenv(
+            "TRACECONTEXT_AGENT_CACHE_PATH",
+            os.path.join("~", ".tracecontext", "agent_cache.db"),
+        ))
+        if max_entries is None:
+            max_entries = int(os.getenv("TRACECONTEXT_AGENT_CACHE_SIZE", 10000))
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened lazily so demo mode (no API key) never touches the filesystem
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            return row[0]
+
+    def set(self, key: str, value: str):
+        if not self.enabled:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, accessed_at) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,),
+                )
+            conn.commit()
+
+    def __len__(self) -> int:
+        if not self.enabled:
+            return 0
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def clear(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM entries")
+            conn.commit()
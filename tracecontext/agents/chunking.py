@@ -0,0 +1,79 @@
+"""
+Diff chunking helpers for distilling commits that do not fit in one prompt.
+
+Diffs are split at file boundaries first, then at hunk boundaries, and only
+as a last resort at line boundaries. Every piece keeps its file header so the
+model always knows which file a hunk belongs to.
+"""
+
+import re
+from typing import Iterable, Iterator
+
+_FILE_START = re.compile(r"^diff --git ", re.MULTILINE)
+_HUNK_START = re.compile(r"^@@", re.MULTILINE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for code and English)."""
+    return (len(text) + 3) // 4
+
+
+def _split_before(text: str, pattern: re.Pattern) -> list[str]:
+    starts = [m.start() for m in pattern.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    return [text[a:b] for a, b in zip(starts, starts[1:] + [len(text)]) if text[a:b].strip()]
+
+
+def _split_lines(text: str, header: str, max_tokens: int) -> Iterator[str]:
+    budget = max(max_tokens * 4 - len(header), 1)
+    current = ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > budget:
+            if current:
+                yield header + current
+                current = ""
+            yield header + line[:budget]
+            line = line[budget:]
+        if len(current) + len(line) > budget:
+            yield header + current
+            current = ""
+        current += line
+    if current:
+        yield header + current
+
+
+def split_diff(diff: str, max_tokens: int) -> Iterator[str]:
+    """Lazily yield pieces of `diff`, each within `max_tokens`."""
+    for file_part in _split_before(diff, _FILE_START):
+        if estimate_tokens(file_part) <= max_tokens:
+            yield file_part
+            continue
+        hunks = _split_before(file_part, _HUNK_START)
+        if _HUNK_START.match(hunks[0]):
+            header = ""
+        elif len(hunks) > 1:
+            header = hunks.pop(0)
+        else:
+            # No hunk headers (e.g. raw text): keep the first line as context
+            first, _, rest = file_part.partition("\n")
+            header, hunks = first + "\n", [rest]
+        for hunk in hunks:
+            if estimate_tokens(header + hunk) <= max_tokens:
+                yield header + hunk
+            else:
+                yield from _split_lines(hunk, header, max_tokens)
+
+
+def pack_chunks(pieces: Iterable[str], max_tokens: int, separator: str = "") -> Iterator[str]:
+    """Greedily join consecutive pieces while the result stays within `max_tokens`."""
+    current = ""
+    for piece in pieces:
+        candidate = current + separator + piece if current else piece
+        if current and estimate_tokens(candidate) > max_tokens:
+            yield current
+            current = piece
+        else:
+            current = candidate
+    if current:
+        yield current
@@ -1,7 +1,13 @@
-import os
-from langchain_openai import ChatOpenAI
+import logging
+
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
+from typing import Optional
+
+from .cache import ResultCache, content_key, normalize_text
+from .llm import get_llm
+
+logger = logging.getLogger(__name__)
 
 
 class DeadEndRecord(BaseModel):
@@ -10,15 +16,20 @@ class DeadEndRecord(BaseModel):
     alternatives: str = Field(description="What was done instead")
 
 
+TRACK_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "Analyze the following developer activity. Identify if an approach was abandoned or reverted and explain why."),
+    ("user", "Activity Log: {event_sequence}")
+])
+
+
 class DeadEndTracker:
-    def __init__(self):
-        self.llm = None
-        api_key = os.getenv("OPENAI_API_KEY")
-        if api_key:
-            try:
-                self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, api_key=api_key)
-            except Exception as e:
-                print(f"Warning: Could not initialize OpenAI client: {e}")
+    def __init__(self, cache: Optional[ResultCache] = None):
+        self.cache = cache
+        self.llm = get_llm()
+        self.chain = (
+            (TRACK_PROMPT | self.llm.with_structured_output(DeadEndRecord)).with_config(metadata={"agent": "dead_end"})
+            if self.llm else None
+        )
 
     def track(self, event_sequence: str) -> DeadEndRecord:
         if self.llm is None:
@@ -28,18 +39,23 @@ class DeadEndTracker:
                 alternatives="See docs for setup instructions."
             )
 
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "Analyze the following developer activity. Identify if an approach was abandoned or reverted and explain why."),
-            ("user", "Activity Log: {event_sequence}")
-        ])
+        cache_key = None
+        if self.cache is not None:
+            cache_key = content_key("dead_end", normalize_text(event_sequence))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return DeadEndRecord.model_validate_json(cached)
 
-        chain = prompt | self.llm.with_structured_output(DeadEndRecord)
         try:
-            return chain.invoke({"event_sequence": event_sequence})
+            result = self.chain.invoke({"event_sequence": event_sequence})
         except Exception as e:
-            print(f"DeadEnd Agent Error: {e}")
+            logger.warning(f"DeadEnd Agent Error: {e}")
             return DeadEndRecord(
                 approach="[DEMO] Analyzed Approach",
                 failure_reason=f"API error: {e}",
                 alternatives="Check OPENAI_API_KEY and billing."
             )
+
+        if cache_key is not None:
+            self.cache.set(cache_key, result.model_dump_json())
+        return result
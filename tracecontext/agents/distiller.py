@@ -1,7 +1,14 @@
 import os
-from langchain_openai import ChatOpenAI
+import logging
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from .cache import ResultCache, content_key, normalize_diff, normalize_text
+from .chunking import estimate_tokens, pack_chunks, split_diff
+from .llm import get_llm
+
+logger = logging.getLogger(__name__)
 
 
 class ADRModel(BaseModel):
@@ -12,15 +19,52 @@ class ADRModel(BaseModel):
     consequences: str = Field(description="Pros and cons of the decision")
 
 
+class ADRBatch(BaseModel):
+    adrs: List[ADRModel] = Field(description="One ADR per commit, in the same order as the commits")
+
+
+class ChunkSummary(BaseModel):
+    summary: str = Field(description="Architecturally relevant changes in this part of the commit")
+
+
+DISTILL_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are an expert software architect. Distill the following code changes into a structured ADR in MADR format."),
+    ("user", "Commit Message: {commit_msg}\n\nDiff:\n{diff}")
+])
+
+# Large diffs: summarize each chunk (map), then distill the summaries into one ADR (reduce)
+SUMMARIZE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are an expert software architect. Summarize the architecturally relevant changes in this part of a larger commit. Be concise and concrete."),
+    ("user", "Commit Message: {commit_msg}\n\nPart {part} of {total}:\n{diff}")
+])
+
+# Several small commits distilled in one request (see agents/batcher.py)
+BATCH_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are an expert software architect. Distill each of the following commits into its own structured ADR in MADR format. Return exactly one ADR per commit, in the same order."),
+    ("user", "{commits}")
+])
+
+REDUCE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are an expert software architect. The following are summaries of the parts of one large commit. Distill them into a single structured ADR in MADR format."),
+    ("user", "Commit Message: {commit_msg}\n\nChange summaries:\n{summaries}")
+])
+
+
 class ArchitectureDistiller:
-    def __init__(self):
-        self.llm = None
-        api_key = os.getenv("OPENAI_API_KEY")
-        if api_key:
-            try:
-                self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, api_key=api_key)
-            except Exception as e:
-                print(f"Warning: Could not initialize OpenAI client: {e}")
+    def __init__(self, cache: Optional[ResultCache] = None):
+        self.cache = cache
+        self.llm = get_llm()
+        self.max_diff_tokens = int(os.getenv("TRACECONTEXT_DISTILL_CHUNK_TOKENS", 6000))
+        self.max_concurrency = int(os.getenv("TRACECONTEXT_DISTILL_CONCURRENCY", 4))
+        # Built once; runnables are stateless and safe to share across threads
+        self.chain = self.batch_chain = self.summary_chain = self.reduce_chain = None
+        if self.llm is not None:
+            # Labels LLM latency/token metrics (see tracecontext/metrics.py)
+            agent = {"metadata": {"agent": "distiller"}}
+            self.chain = (DISTILL_PROMPT | self.llm.with_structured_output(ADRModel)).with_config(agent)
+            self.batch_chain = (BATCH_PROMPT | self.llm.with_structured_output(ADRBatch)).with_config(agent)
+            self.summary_chain = (SUMMARIZE_PROMPT | self.llm.with_structured_output(ChunkSummary)).with_config(agent)
+            self.reduce_chain = (REDUCE_PROMPT | self.llm.with_structured_output(ADRModel)).with_config(agent)
 
     def distill(self, diff: str, commit_msg: str) -> ADRModel:
         if self.llm is None:
@@ -32,16 +76,18 @@ class ArchitectureDistiller:
                 consequences="See docs for setup instructions."
             )
 
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are an expert software architect. Distill the following code changes into a structured ADR in MADR format."),
-            ("user", "Commit Message: {commit_msg}\n\nDiff:\n{diff}")
-        ])
+        cache_key = self._cache_key(diff, commit_msg)
+        cached = self._cached(cache_key)
+        if cached is not None:
+            return cached
 
-        chain = prompt | self.llm.with_structured_output(ADRModel)
         try:
-            return chain.invoke({"commit_msg": commit_msg, "diff": diff})
+            if estimate_tokens(diff) > self.max_diff_tokens:
+                result = self._map_reduce(diff, commit_msg)
+            else:
+                result = self.chain.invoke({"commit_msg": commit_msg, "diff": diff})
         except Exception as e:
-            print(f"Distiller Agent Error: {e}")
+            logger.warning(f"Distiller Agent Error: {e}")
             return ADRModel(
                 title=f"[DEMO] Change: {commit_msg[:60] if commit_msg else 'Unknown'}",
                 status="Proposed",
@@ -49,3 +95,78 @@ class ArchitectureDistiller:
                 decision=commit_msg or "No commit message provided.",
                 consequences="Check OPENAI_API_KEY and billing."
             )
+
+        if cache_key is not None:
+            self.cache.set(cache_key, result.model_dump_json())
+        return result
+
+    def distill_batch(self, items: List[tuple[str, str]]) -> List[ADRModel]:
+        """Distill several (diff, commit_msg) pairs with one LLM request.
+
+        Falls back to one `distill` call per item if the batched request fails
+        or does not return exactly one ADR per commit.
+        """
+        if self.llm is None or len(items) < 2:
+            return [self.distill(diff, msg) for diff, msg in items]
+
+        keys = [self._cache_key(diff, msg) for diff, msg in items]
+        results: List[Optional[ADRModel]] = [self._cached(key) for key in keys]
+        missing = [i for i, r in enumerate(results) if r is None]
+        if len(missing) > 1:
+            commits = "\n\n".join(
+                f"### Commit {n}\nCommit Message: {items[i][1]}\n\nDiff:\n{items[i][0]}"
+                for n, i in enumerate(missing, 1)
+            )
+            try:
+                batch = self.batch_chain.invoke({"commits": commits})
+                if len(batch.adrs) == len(missing):
+                    for i, adr in zip(missing, batch.adrs):
+                        results[i] = adr
+                        if keys[i] is not None:
+                            self.cache.set(keys[i], adr.model_dump_json())
+                else:
+                    logger.warning(f"Distiller batch returned {len(batch.adrs)} ADRs for {len(missing)} commits, retrying individually")
+            except Exception as e:
+                logger.warning(f"Distiller batch error, retrying individually: {e}")
+
+        return [r if r is not None else self.distill(*items[i]) for i, r in enumerate(results)]
+
+    def _cache_key(self, diff: str, commit_msg: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return content_key("distill", normalize_text(commit_msg), normalize_diff(diff))
+
+    def _cached(self, cache_key: Optional[str]) -> Optional[ADRModel]:
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        return ADRModel.model_validate_json(cached) if cached is not None else None
+
+    def _summarize(self, pieces: list[str], commit_msg: str) -> list[str]:
+        """Map step: summarize pieces concurrently, skipping any that fail."""
+        inputs = [
+            {"commit_msg": commit_msg, "part": i + 1, "total": len(pieces), "diff": piece}
+            for i, piece in enumerate(pieces)
+        ]
+        results = self.summary_chain.batch(
+            inputs, config={"max_concurrency": self.max_concurrency}, return_exceptions=True,
+        )
+        summaries = [r.summary for r in results if isinstance(r, ChunkSummary)]
+        if not summaries:
+            errors = [r for r in results if isinstance(r, Exception)]
+            raise errors[0] if errors else ValueError("No diff chunks were summarized")
+        return summaries
+
+    def _map_reduce(self, diff: str, commit_msg: str) -> ADRModel:
+        pieces = list(pack_chunks(split_diff(diff, self.max_diff_tokens), self.max_diff_tokens))
+        summaries = self._summarize(pieces, commit_msg)
+        # Collapse summaries until they fit into a single reduce prompt
+        while len(summaries) > 1 and estimate_tokens("\n".join(summaries)) > self.max_diff_tokens:
+            groups = list(pack_chunks(summaries, self.max_diff_tokens, separator="\n"))
+            if len(groups) == len(summaries):
+                break
+            summaries = self._summarize(groups, commit_msg)
+        return self.reduce_chain.invoke({
+            "commit_msg": commit_msg,
+            "summaries": "\n".join(f"- {s}" for s in summaries),
+        })
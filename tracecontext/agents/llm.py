@@ -0,0 +1,44 @@
+"""
+Shared LLM client for all agents.
+
+Every agent reuses one ChatOpenAI instance (and so one pooled, keep-alive
+HTTP connection pool) per API key and model, instead of opening a new client
+and TLS session for each event.
+"""
+
+import os
+import logging
+from functools import lru_cache
+from typing import Optional
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from ..metrics import llm_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+
+@lru_cache(maxsize=None)
+def _build_llm(api_key: str, model: str) -> ChatOpenAI:
+    max_connections = int(os.getenv("TRACECONTEXT_LLM_MAX_CONNECTIONS", 20))
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+    )
+    return ChatOpenAI(
+        model=model, temperature=0, api_key=api_key, http_client=http_client, callbacks=[llm_metrics],
+    )
+
+
+def get_llm(model: str = DEFAULT_MODEL) -> Optional[ChatOpenAI]:
+    """Return the shared client, or None when OPENAI_API_KEY is not set."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    try:
+        return _build_llm(api_key, model)
+    except Exception as e:
+        logger.warning(f"Could not initialize OpenAI client: {e}")
+        return None
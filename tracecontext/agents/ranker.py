@@ -1,8 +1,13 @@
-import os
-from langchain_openai import ChatOpenAI
+import logging
+
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
+
+from .llm import get_llm
+from ..retrieval.cache import TTLCache, normalize_query, fingerprint
+
+logger = logging.getLogger(__name__)
 
 
 class ContextScore(BaseModel):
@@ -15,15 +20,22 @@ class RankingResult(BaseModel):
     scores: List[ContextScore]
 
 
+RANK_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a context relevance expert. Score the following context chunks based on their relevance to the provided task description."),
+    ("user", "Task: {task_description}\n\nChunks:\n{chunks}")
+])
+
+
 class ContextRanker:
-    def __init__(self):
-        self.llm = None
-        api_key = os.getenv("OPENAI_API_KEY")
-        if api_key:
-            try:
-                self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, api_key=api_key)
-            except Exception as e:
-                print(f"Warning: Could not initialize OpenAI client: {e}")
+    def __init__(self, cache: Optional[TTLCache] = None):
+        # Results are cached per (normalized task, candidate id set); a new record
+        # entering the candidate set changes the fingerprint and misses the cache.
+        self.cache = cache
+        self.llm = get_llm()
+        self.chain = (
+            (RANK_PROMPT | self.llm.with_structured_output(RankingResult)).with_config(metadata={"agent": "ranker"})
+            if self.llm else None
+        )
 
     def rank(self, task_description: str, context_chunks: List[dict]) -> RankingResult:
         if self.llm is None:
@@ -32,19 +44,24 @@ class ContextRanker:
                 for c in context_chunks
             ])
 
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a context relevance expert. Score the following context chunks based on their relevance to the provided task description."),
-            ("user", "Task: {task_description}\n\nChunks:\n{chunks}")
-        ])
+        cache_key = None
+        if self.cache is not None:
+            cache_key = (normalize_query(task_description), fingerprint(sorted(str(c.get("id")) for c in context_chunks)))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
 
         chunks_str = "\n".join([f"- ID: {c.get('id', 'N/A')}: {c.get('content', '')}" for c in context_chunks])
 
-        chain = prompt | self.llm.with_structured_output(RankingResult)
         try:
-            return chain.invoke({"task_description": task_description, "chunks": chunks_str})
+            result = self.chain.invoke({"task_description": task_description, "chunks": chunks_str})
         except Exception as e:
-            print(f"Ranker Agent Error: {e}")
+            logger.warning(f"Ranker Agent Error: {e}")
             return RankingResult(scores=[
                 ContextScore(id=c.get("id", "mock"), relevance_score=0.9, reasoning=f"API error: {e}")
                 for c in context_chunks
             ])
+
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+        return result
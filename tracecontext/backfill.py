@@ -0,0 +1,229 @@
+"""
+Backfill — ingest a repository's existing git history.
+
+`tracecontext backfill` streams `git log` oldest-first (one commit in memory at
+a time), filters out merges, bot authors and commits that only touch excluded
+paths, and uploads the rest with a bounded number of requests in flight and
+an optional rate limit, one compressed POST /events/batch per batch. Progress is checkpointed to
+`.git/tracecontext/backfill.json` so an interrupted run resumes after the
+last commit that was delivered, even with 100k+ commit histories. Resume
+with the same filters; `--restart` starts over from the current HEAD.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+import subprocess
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Optional
+
+import requests
+
+from .spool import _send_batch, build_event, spool_dir
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = "backfill.json"
+DEFAULT_SKIP_AUTHORS = [r"\[bot\]", r"^dependabot", r"^renovate"]
+# Unit separator between fields of one `git log` line
+FIELD_SEP = "\x1f"
+
+
+def iter_commits(
+    tip: str,
+    cwd: Optional[str] = None,
+    include_merges: bool = False,
+    exclude_paths: tuple = (),
+) -> Iterator[dict]:
+    """Stream commits reachable from tip, oldest first, without buffering the history."""
+    args = ["git", "log", "--reverse", f"--format=%H{FIELD_SEP}%an{FIELD_SEP}%ae{FIELD_SEP}%ct", tip]
+    if not include_merges:
+        args.append("--no-merges")
+    if exclude_paths:
+        # Only commits touching something outside the excluded paths are listed
+        args += ["--", "."] + [f":(exclude){path}" for path in exclude_paths]
+    proc = subprocess.Popen(
+        args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        text=True, encoding="utf-8", errors="replace",
+    )
+    try:
+        for line in proc.stdout:
+            sha, name, email, timestamp = line.rstrip("\n").split(FIELD_SEP)
+            yield {"sha": sha, "author": name, "email": email, "timestamp": timestamp}
+    finally:
+        proc.stdout.close()
+        proc.kill()
+        proc.wait()
+
+
+class Checkpoint:
+    """The tip being backfilled, the last commit up to which everything was delivered,
+    and commits past it already delivered out of order (skipped on resume)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tip: Optional[str] = None
+        self.done: Optional[str] = None
+        self.ahead: set[str] = set()
+        self.sent = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.tip, self.done, self.sent = data.get("tip"), data.get("done"), data.get("sent", 0)
+            self.ahead = set(data.get("ahead", []))
+
+    @property
+    def complete(self) -> bool:
+        return self.tip is not None and self.done == self.tip
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"tip": self.tip, "done": self.done, "ahead": sorted(self.ahead), "sent": self.sent}, f)
+        os.replace(tmp, self.path)
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads. rate=0 disables it."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self, n: int = 1):
+        """Block until n more calls fit under the rate."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval * n
+        if delay > 0:
+            time.sleep(delay)
+
+
+def backfill(
+    url: str,
+    cwd: Optional[str] = None,
+    concurrency: int = 4,
+    batch_size: int = 50,
+    rate: float = 0.0,
+    include_merges: bool = False,
+    skip_authors: tuple = tuple(DEFAULT_SKIP_AUTHORS),
+    exclude_paths: tuple = (),
+    limit: Optional[int] = None,
+    restart: bool = False,
+    retries: int = 3,
+    progress: Optional[Callable[[int], None]] = None,
+) -> int:
+    """Upload existing history to the orchestrator. Returns the number of commits sent."""
+    directory = spool_dir(cwd)
+    os.makedirs(directory, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(directory, CHECKPOINT_FILE))
+    if restart or checkpoint.tip is None:
+        checkpoint.tip = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        checkpoint.done, checkpoint.ahead, checkpoint.sent = None, set(), 0
+        checkpoint.save()
+    if checkpoint.complete:
+        return 0
+
+    repo = subprocess.run(
+        ["git", "config", "--get", "remote.origin.url"], cwd=cwd, capture_output=True, text=True,
+    ).stdout.strip()
+    author_filter = re.compile("|".join(skip_authors)) if skip_authors else None
+    limiter = RateLimiter(rate)
+
+    # Commits complete out of order; the checkpoint only advances over a contiguous prefix
+    lock = threading.Lock()
+    order: deque = deque()
+    finished: set[str] = set()
+    slots = threading.BoundedSemaphore(concurrency * 2)
+    failures: list[Exception] = []
+    sent = 0
+
+    def advance():
+        while order and order[0] in finished:
+            finished.discard(order[0])
+            checkpoint.done = order.popleft()
+        checkpoint.ahead = set(finished)
+        checkpoint.save()
+
+    def upload(session: requests.Session, commits: list[dict]):
+        nonlocal sent
+        try:
+            pairs = []
+            for commit in commits:
+                event = build_event(f"{commit['sha']}\t{commit['timestamp']}\t{commit['author']}", cwd, repo)
+                if event is not None:
+                    event["metadata"]["source"] = "backfill"
+                pairs.append((commit, event))
+            events = [e for _, e in pairs if e is not None]
+            undelivered = []
+            if events:
+                limiter.wait(len(events))
+                undelivered = _send_batch(session, url, events, retries)
+            failed = {id(e) for e in undelivered}
+            delivered = len(events) - len(undelivered)
+            with lock:
+                sent += delivered
+                checkpoint.sent += delivered
+                # Commits the orchestrator accepted are finished even when others in the batch were not
+                finished.update(c["sha"] for c, e in pairs if id(e) not in failed)
+                advance()
+            if progress is not None:
+                progress(delivered)
+            if undelivered:
+                raise requests.RequestException(f"{len(undelivered)} commit(s) could not be delivered")
+        except Exception as e:
+            with lock:
+                failures.append(e)
+        finally:
+            slots.release()
+
+    def submit(session: requests.Session, pool: ThreadPoolExecutor, batch: list[dict]):
+        slots.acquire()
+        pool.submit(upload, session, batch)
+
+    # Resume after the checkpointed commit
+    skipping = checkpoint.done is not None
+    queued = 0
+    batch: list[dict] = []
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for commit in iter_commits(checkpoint.tip, cwd, include_merges, exclude_paths):
+            if skipping:
+                skipping = commit["sha"] != checkpoint.done
+                continue
+            if failures or (limit is not None and queued >= limit):
+                break
+            with lock:
+                order.append(commit["sha"])
+                if commit["sha"] in checkpoint.ahead:
+                    # Delivered by an earlier, interrupted run
+                    finished.add(commit["sha"])
+                    continue
+                if author_filter and (author_filter.search(commit["author"]) or author_filter.search(commit["email"])):
+                    finished.add(commit["sha"])
+                    continue
+            batch.append(commit)
+            queued += 1
+            if len(batch) >= batch_size:
+                submit(session, pool, batch)
+                batch = []
+        if batch and not failures:
+            submit(session, pool, batch)
+
+    with lock:
+        advance()
+        if not failures and not order and limit is None:
+            checkpoint.done = checkpoint.tip
+            checkpoint.save()
+    if failures:
+        raise failures[0]
+    return sent
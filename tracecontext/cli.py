@@ -26,26 +26,16 @@ def init():
         console.print("[red]Error: Not a git repository.[/red]")
         return
 
+    # Spool the commit and return immediately; `tracecontext flush` uploads it in the background
     hook_content = """#!/bin/bash
 # TraceContext Git Hook
-MESSAGE=$(git log -1 --pretty=%B)
-DIFF=$(git diff HEAD~1 HEAD)
-REPO_URL=$(git config --get remote.origin.url)
-USER_NAME=$(whoami)
-
-# Use Python to safely send the JSON request to avoid shell escaping issues
-python -c "
-import requests, json, sys
-data = {
-    'type': 'git_commit',
-    'data': {'message': sys.argv[1], 'diff': sys.argv[2]},
-    'metadata': {'repo': sys.argv[3], 'user': sys.argv[4]}
-}
-try:
-    requests.post('http://localhost:8000/events', json=data, timeout=5)
-except:
-    pass
-" \\"$MESSAGE\\" \\"$DIFF\\" \\"$REPO_URL\\" \\"$USER_NAME\\" &
+SPOOL_DIR="$(git rev-parse --git-dir)/tracecontext"
+mkdir -p "$SPOOL_DIR"
+printf '%s\\t%s\\t%s\\n' "$(git rev-parse HEAD)" "$(date +%s)" "$(whoami)" >> "$SPOOL_DIR/spool"
+
+if command -v tracecontext >/dev/null 2>&1; then
+    (tracecontext flush --quiet >/dev/null 2>&1 &)
+fi
 """
     hook_path = ".git/hooks/post-commit"
     with open(hook_path, "w") as f:
@@ -57,6 +47,62 @@ except:
 
     console.print(Panel("[green]TraceContext initialized successfully![/green]\nGit post-commit hook installed.", title="Success"))
 
+@main.command()
+@click.option("--quiet", is_flag=True, help="Print nothing (used by the git hook).")
+def flush(quiet):
+    """Upload commits spooled by the git hook to the orchestrator."""
+    from tracecontext.spool import flush as flush_spool
+    try:
+        sent, remaining = flush_spool(ORCHESTRATOR_URL)
+    except Exception as e:
+        if not quiet:
+            console.print(f"[red]Flush failed:[/red] {e}")
+        sys.exit(1)
+    if not quiet:
+        console.print(f"[green]Uploaded {sent} commit(s).[/green]")
+        if remaining:
+            console.print(f"[yellow]{remaining} commit(s) still spooled — is the orchestrator running?[/yellow]")
+
+@main.command()
+@click.option("--concurrency", default=4, show_default=True, help="Batches uploaded in parallel.")
+@click.option("--batch-size", default=50, show_default=True, help="Commits per upload request.")
+@click.option("--rate", default=0.0, show_default=True, help="Max commits per second (0 = unlimited).")
+@click.option("--include-merges", is_flag=True, help="Also ingest merge commits.")
+@click.option("--skip-author", multiple=True, help="Regex for author names/emails to skip (default: common bots).")
+@click.option("--exclude-path", multiple=True, help="Skip commits that only touch these paths (git pathspec).")
+@click.option("--limit", type=int, default=None, help="Stop after this many commits.")
+@click.option("--restart", is_flag=True, help="Ignore the checkpoint and start over from HEAD.")
+def backfill(concurrency, batch_size, rate, include_merges, skip_author, exclude_path, limit, restart):
+    """Ingest existing git history, resuming where an earlier run stopped."""
+    if not os.path.exists(".git"):
+        console.print("[red]Error: Not a git repository.[/red]")
+        return
+    from tracecontext.backfill import DEFAULT_SKIP_AUTHORS, backfill as run_backfill
+    count = [0]
+
+    def progress(n):
+        count[0] += n
+        if count[0] % 100 == 0:
+            console.print(f"  {count[0]} commit(s) sent...")
+
+    try:
+        sent = run_backfill(
+            ORCHESTRATOR_URL,
+            concurrency=concurrency,
+            batch_size=batch_size,
+            rate=rate,
+            include_merges=include_merges,
+            skip_authors=skip_author or tuple(DEFAULT_SKIP_AUTHORS),
+            exclude_paths=exclude_path,
+            limit=limit,
+            restart=restart,
+            progress=progress,
+        )
+    except Exception as e:
+        console.print(f"[red]Backfill interrupted:[/red] {e}\nRun [bold]tracecontext backfill[/bold] again to resume.")
+        sys.exit(1)
+    console.print(f"[green]Backfill sent {sent} commit(s).[/green]")
+
 @main.command()
 def status():
     """Check the status of the TraceContext orchestrator."""
@@ -90,7 +136,8 @@ def search(query):
         console.print("[red]Error connecting to orchestrator.[/red]")
 
 @main.command(name="mcp")
-def mcp_command():
+@click.option("--embedded", is_flag=True, help="Run the orchestrator inside the MCP server (no `tracecontext serve` needed).")
+def mcp_command(embedded):
     """Start the TraceContext MCP server for Claude Code / Cursor / Antigravity.
 
     Add this to ~/.claude/claude_desktop_config.json:
@@ -105,7 +152,11 @@ def mcp_command():
         }
       }
     }
+
+    Use "args": ["mcp", "--embedded"] to run without a separate orchestrator.
     """
+    if embedded:
+        os.environ["TRACECONTEXT_MCP_MODE"] = "embedded"
     from tracecontext.mcp_server import mcp as server
     server.run()
 
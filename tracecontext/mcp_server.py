@@ -25,18 +25,34 @@ Claude Code config (~/.claude/claude_desktop_config.json):
       }
     }
 
-Note: The TraceContext orchestrator must be running separately:
+Note: By default the TraceContext orchestrator must be running separately:
     tracecontext serve
+
+For single-developer use, embedded mode hosts the store, indexes and agent
+pipeline inside the MCP server process and calls them directly:
+    tracecontext mcp --embedded      (or TRACECONTEXT_MCP_MODE=embedded)
 """
 
 import os
-import requests
+import time
+import asyncio
+import subprocess
+from functools import lru_cache
+
+import httpx
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
 
 load_dotenv()
 
 ORCHESTRATOR_URL = os.getenv("ORCHESTRATOR_URL", "http://localhost:8000")
+# Token budget and hints for the active-context resource read at session start
+CONTEXT_TOKENS = int(os.getenv("TRACECONTEXT_MCP_CONTEXT_TOKENS", 4000))
+CONTEXT_PATHS = [p.strip() for p in os.getenv("TRACECONTEXT_MCP_PATHS", "").split(",") if p.strip()]
+# "remote" talks to ORCHESTRATOR_URL; "embedded" runs the orchestrator in this process
+EMBEDDED = os.getenv("TRACECONTEXT_MCP_MODE", "remote") == "embedded"
+TIMEOUT = float(os.getenv("TRACECONTEXT_MCP_TIMEOUT", 5))
+RETRIES = int(os.getenv("TRACECONTEXT_MCP_RETRIES", 2))
 
 mcp = FastMCP(
     "TraceContext",
@@ -56,30 +72,111 @@ mcp = FastMCP(
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _get(path: str, params: dict = None) -> dict:
-    """GET from the orchestrator. Returns {} on connection failure."""
+_client: httpx.AsyncClient = None
+
+
+def _http() -> httpx.AsyncClient:
+    """One keep-alive client shared by every tool and resource call."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=ORCHESTRATOR_URL,
+            timeout=httpx.Timeout(TIMEOUT, connect=min(TIMEOUT, 2.0)),
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            # Retries connection failures only; a request that reached the server is never resent
+            transport=httpx.AsyncHTTPTransport(retries=RETRIES),
+        )
+    return _client
+
+
+async def _request(method: str, path: str, **kwargs) -> dict:
     try:
-        r = requests.get(f"{ORCHESTRATOR_URL}{path}", params=params, timeout=5)
+        r = await _http().request(method, path, **kwargs)
+        if r.status_code == 304:
+            return {"_not_modified": True}
         r.raise_for_status()
-        return r.json()
-    except requests.exceptions.ConnectionError:
+        return {**r.json(), "_etag": r.headers.get("etag")}
+    except httpx.ConnectError:
         return {"_offline": True}
     except Exception as e:
         return {"_error": str(e)}
 
 
-def _post(path: str, body: dict) -> dict:
-    """POST to the orchestrator. Returns {} on connection failure."""
+async def _get(path: str, params: dict = None, etag: str = None) -> dict:
+    """GET from the orchestrator. Returns {"_offline": True} on connection failure,
+    or {"_not_modified": True} when etag is still current."""
+    if EMBEDDED:
+        return await _embedded(_embedded_get, path, params or {}, etag)
+    headers = {"If-None-Match": etag} if etag else None
+    return await _request("GET", path, params=params, headers=headers)
+
+
+async def _post(path: str, body: dict) -> dict:
+    """POST to the orchestrator. Returns {"_offline": True} on connection failure."""
+    if EMBEDDED:
+        return await _embedded(_embedded_post, path, body)
+    return await _request("POST", path, json=body)
+
+
+# ---------------------------------------------------------------------------
+# Embedded mode — the orchestrator's functions called in-process, no HTTP hop
+# ---------------------------------------------------------------------------
+
+async def _embedded(handler, *args) -> dict:
+    # Retrieval and reranking block (SQLite, LLM); keep them off the event loop
     try:
-        r = requests.post(f"{ORCHESTRATOR_URL}{path}", json=body, timeout=5)
-        r.raise_for_status()
-        return r.json()
-    except requests.exceptions.ConnectionError:
-        return {"_offline": True}
+        return await asyncio.to_thread(handler, *args)
     except Exception as e:
         return {"_error": str(e)}
 
 
+def _embedded_get(path: str, params: dict, etag: str = None) -> dict:
+    from tracecontext.orchestrator import main as orchestrator
+    version = str(orchestrator.response_cache.version())
+    if etag == version:
+        return {"_not_modified": True}
+    if path == "/context/active":
+        data = orchestrator.build_active_context(
+            params.get("budget", orchestrator.ACTIVE_CONTEXT_TOKENS), params.get("repo"), params.get("path", []),
+        )
+    elif path == "/context":
+        data = orchestrator.build_context(query=params.get("query", ""), limit=params.get("limit"))
+    else:
+        raise ValueError(f"Unsupported embedded GET {path}")
+    return {**data, "_etag": version}
+
+
+def _embedded_post(path: str, body: dict) -> dict:
+    from tracecontext.orchestrator import main as orchestrator
+    if path != "/events":
+        raise ValueError(f"Unsupported embedded POST {path}")
+    event_id = orchestrator.submit_event(orchestrator.Event(**body))
+    return {"status": "accepted", "event_id": event_id}
+
+
+@lru_cache(maxsize=1)
+def _repo_hint() -> str:
+    """The repo this session works in, matched against the repo the git hook records."""
+    repo = os.getenv("TRACECONTEXT_MCP_REPO")
+    if repo is not None:
+        return repo
+    try:
+        return subprocess.run(
+            ["git", "config", "--get", "remote.origin.url"], capture_output=True, text=True, timeout=2,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def _client_span(name: str, started: float) -> list[dict]:
+    """Client-side span attached to an event so it shows up in the event's trace.
+
+    It has no end: the orchestrator closes it when the event arrives, so it
+    covers the tool call up to and including the request itself.
+    """
+    return [{"name": name, "start": started}]
+
+
 def _offline_msg() -> str:
     return (
         "[TraceContext] Orchestrator is offline.\n"
@@ -95,19 +192,33 @@ def _format_records(records: list[str]) -> str:
 # Resource — injected automatically at session start
 # ---------------------------------------------------------------------------
 
+# Last (ETag, rendered text) of the active-context resource, revalidated on each read
+_active_context: tuple = (None, "")
+
+
 @mcp.resource("tracecontext://active-context")
-def active_context() -> str:
+async def active_context() -> str:
     """
-    All active TraceContext records for this codebase: ADRs, dead-ends, and
-    codebase maps. Read this at the start of every session so the AI is
-    already briefed before the developer types a single word.
+    The most useful TraceContext records for this codebase — active dead-ends
+    and recent decisions, favouring this repo — within a token budget. Read
+    this at the start of every session so the AI is already briefed before
+    the developer types a single word.
     """
-    data = _get("/context")
+    global _active_context
+    etag, cached = _active_context
+    params = {"budget": CONTEXT_TOKENS, "path": CONTEXT_PATHS}
+    if _repo_hint():
+        params["repo"] = _repo_hint()
+    data = await _get("/context/active", params=params, etag=etag)
+    if "_not_modified" in data:
+        return cached
     if "_offline" in data:
         return _offline_msg()
     if "_error" in data:
         return f"[TraceContext] Error: {data['_error']}"
-    return _format_records(data.get("context", []))
+    text = _format_records(data.get("context", []))
+    _active_context = (data.get("_etag"), text)
+    return text
 
 
 # ---------------------------------------------------------------------------
@@ -115,7 +226,7 @@ def active_context() -> str:
 # ---------------------------------------------------------------------------
 
 @mcp.tool()
-def search_context(query: str) -> str:
+async def search_context(query: str) -> str:
     """
     Search TraceContext for relevant architectural decisions and dead-end records.
 
@@ -129,7 +240,7 @@ def search_context(query: str) -> str:
         query: Keywords or a natural language question about the codebase.
                Examples: "why Stripe", "payment pattern", "Redis caching decision"
     """
-    data = _get("/context", params={"query": query})
+    data = await _get("/context", params={"query": query})
     if "_offline" in data:
         return _offline_msg()
     if "_error" in data:
@@ -142,7 +253,7 @@ def search_context(query: str) -> str:
 
 
 @mcp.tool()
-def add_decision(
+async def add_decision(
     title: str,
     decision: str,
     context: str,
@@ -160,14 +271,15 @@ def add_decision(
         context:      The problem or situation that drove this decision
         consequences: Trade-offs, pros/cons (optional)
     """
+    started = time.time()
     diff_text = f"Context: {context}\nDecision: {decision}"
     if consequences:
         diff_text += f"\nConsequences: {consequences}"
 
-    result = _post("/events", {
+    result = await _post("/events", {
         "type": "git_commit",
         "data": {"message": title, "diff": diff_text},
-        "metadata": {"source": "mcp-session"},
+        "metadata": {"source": "mcp-session", "client_spans": _client_span("mcp.add_decision", started)},
     })
 
     if "_offline" in result:
@@ -178,7 +290,7 @@ def add_decision(
 
 
 @mcp.tool()
-def add_dead_end(
+async def add_dead_end(
     approach: str,
     reason: str,
     alternative: str = "",
@@ -195,14 +307,15 @@ def add_dead_end(
         reason:      Why it failed or was abandoned
         alternative: What was done instead (optional)
     """
-    result = _post("/events", {
+    started = time.time()
+    result = await _post("/events", {
         "type": "revert_detected",
         "data": {
             "approach": approach,
             "reason": reason,
             "alternative": alternative,
         },
-        "metadata": {"source": "mcp-session"},
+        "metadata": {"source": "mcp-session", "client_spans": _client_span("mcp.add_dead_end", started)},
     })
 
     if "_offline" in result:
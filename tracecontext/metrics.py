@@ -0,0 +1,204 @@
+"""
+Metrics — a small, dependency-free Prometheus-style registry.
+
+Counters, gauges and histograms are recorded in-process and rendered in the
+Prometheus text exposition format by GET /metrics on the orchestrator.
+`LLMMetricsCallback` is attached to the shared LLM client and records latency,
+token usage and errors per agent; chains name their agent with
+`.with_config(metadata={"agent": ...})`.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional, Sequence
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from .tracing import _current, tracer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names: Sequence[str], values: tuple, extra: str = "") -> str:
+    pairs = ['%s="%s"' % (n, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " "))
+             for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(n, "") for n in self.labels)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """A gauge set directly, or read from `fn` at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self) -> list[str]:
+        if self.fn is not None:
+            try:
+                self.set(self.fn())
+            except Exception:
+                pass
+        return super().render()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                for bound, n in zip(self.buckets, counts):
+                    le = _format_labels(self.labels, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{le} {n}")
+                le = _format_labels(self.labels, key, 'le="+Inf"')
+                labels = _format_labels(self.labels, key)
+                lines.append(f"{self.name}_bucket{le} {count}")
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric, or return the one already registered under its name."""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = (), fn: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, help, labels, fn))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(line for m in metrics for line in m.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+LLM_SECONDS = REGISTRY.histogram("tracecontext_llm_call_seconds", "LLM request latency per agent.", ["agent"])
+LLM_TOKENS = REGISTRY.counter("tracecontext_llm_tokens_total", "LLM tokens used per agent.", ["agent", "kind"])
+LLM_ERRORS = REGISTRY.counter("tracecontext_llm_errors_total", "Failed LLM requests per agent.", ["agent"])
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Records latency, token usage and errors of every LLM call, labelled by agent,
+    plus an `llm.<agent>` span when the call is part of a traced event."""
+
+    def __init__(self):
+        self._runs: dict = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, metadata)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._start(run_id, metadata)
+
+    def _start(self, run_id, metadata: Optional[dict]):
+        agent = (metadata or {}).get("agent", "unknown")
+        with self._lock:
+            self._runs[run_id] = (time.perf_counter(), time.time(), agent, _current.get())
+
+    def _finish(self, run_id) -> Optional[str]:
+        with self._lock:
+            started = self._runs.pop(run_id, None)
+        if started is None:
+            return None
+        start, wall_start, agent, span = started
+        LLM_SECONDS.observe(time.perf_counter() - start, agent=agent)
+        if span is not None:
+            tracer.add_span(span[0], f"llm.{agent}", wall_start, time.time(), parent_id=span[1])
+        return agent
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        agent = self._finish(run_id)
+        if agent is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        for kind in ("prompt_tokens", "completion_tokens"):
+            if usage.get(kind):
+                LLM_TOKENS.inc(usage[kind], agent=agent, kind=kind.split("_")[0])
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        agent = self._finish(run_id)
+        LLM_ERRORS.inc(agent=agent or "unknown")
+
+
+llm_metrics = LLMMetricsCallback()
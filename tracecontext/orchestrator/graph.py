@@ -1,9 +1,28 @@
+import logging
 from typing import TypedDict, Annotated, List
 from langgraph.graph import StateGraph, END
 import operator
 
+from ..agents.batcher import DistillBatcher
+from ..agents.cache import ResultCache
 from ..agents.distiller import ArchitectureDistiller
 from ..agents.dead_end import DeadEndTracker
+from ..metrics import REGISTRY
+from ..tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+NODE_SECONDS = REGISTRY.histogram("tracecontext_graph_node_seconds", "Time spent in each LangGraph node.", ["node"])
+
+
+# Agents are created once and shared by every event: one pooled LLM client and
+# prebuilt chains instead of per-event setup. Results are cached on disk by content
+# hash so resent diffs (rebases, cherry-picks, amends) skip the LLM.
+agent_cache = ResultCache()
+distiller = ArchitectureDistiller(cache=agent_cache)
+dead_end_tracker = DeadEndTracker(cache=agent_cache)
+# Optional: groups commits arriving together into one LLM request
+distill_batcher = DistillBatcher(distiller)
 
 
 class AgentState(TypedDict):
@@ -24,9 +43,8 @@ def router(state: AgentState):
 
 
 def distiller_node(state: AgentState):
-    print("--- DISTILLING ARCHITECTURE ---")
-    distiller = ArchitectureDistiller()
-    result = distiller.distill(
+    logger.info("--- DISTILLING ARCHITECTURE ---")
+    result = distill_batcher.distill(
         diff=state["event_data"].get("diff", ""),
         commit_msg=state["event_data"].get("message", "")
     )
@@ -35,32 +53,39 @@ def distiller_node(state: AgentState):
 
 
 def dead_end_tracker_node(state: AgentState):
-    print("--- TRACKING DEAD END ---")
-    tracker = DeadEndTracker()
-    result = tracker.track(event_sequence=str(state["event_data"]))
+    logger.info("--- TRACKING DEAD END ---")
+    result = dead_end_tracker.track(event_sequence=str(state["event_data"]))
     content = f"Approach: {result.approach}\nReason: {result.failure_reason}"
     return {"context_buffer": [{"type": "DEAD_END", "content": content}]}
 
 
 def mapper_node(state: AgentState):
-    print("--- MAPPING CODEBASE ---")
+    logger.info("--- MAPPING CODEBASE ---")
     return {"context_buffer": [{"type": "MAP_UPDATE", "content": "Codebase map updated."}]}
 
 
 def storer_node(state: AgentState):
     # Storage is handled by main.py after the graph completes.
     # This node is a pass-through kept for future persistence logic.
-    print(f"--- STORING {len(state.get('context_buffer', []))} CONTEXT CHUNK(S) ---")
+    logger.info(f"--- STORING {len(state.get('context_buffer', []))} CONTEXT CHUNK(S) ---")
     return {}
 
 
+def timed(name: str, node):
+    """Wrap a node so its latency lands in NODE_SECONDS and the event's trace."""
+    def run(state: AgentState):
+        with NODE_SECONDS.time(node=name), tracer.span(f"node.{name}"):
+            return node(state)
+    return run
+
+
 # Build graph
 workflow = StateGraph(AgentState)
 
-workflow.add_node("distiller", distiller_node)
-workflow.add_node("dead_end_tracker", dead_end_tracker_node)
-workflow.add_node("mapper", mapper_node)
-workflow.add_node("storer", storer_node)
+workflow.add_node("distiller", timed("distiller", distiller_node))
+workflow.add_node("dead_end_tracker", timed("dead_end_tracker", dead_end_tracker_node))
+workflow.add_node("mapper", timed("mapper", mapper_node))
+workflow.add_node("storer", timed("storer", storer_node))
 
 workflow.set_conditional_entry_point(
     router,
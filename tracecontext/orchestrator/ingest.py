@@ -0,0 +1,107 @@
+"""
+IngestQueue — in-process ingestion queue for POST /events.
+
+Events are accepted immediately and handed to a pool of worker threads that
+run the (blocking) LangGraph pipeline, so a slow LLM call never stalls the
+FastAPI event loop. The status of recent events is kept in memory so clients
+can poll GET /events/{event_id} until their record lands in the store.
+
+Configure with:
+    TRACECONTEXT_INGEST_WORKERS     number of worker threads (default 4)
+    TRACECONTEXT_INGEST_QUEUE_SIZE  max pending events before 503 (default 1000)
+"""
+
+import os
+import queue
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when the ingestion queue cannot accept more events."""
+
+
+class IngestQueue:
+    def __init__(
+        self,
+        handler: Callable[[str, object], list],
+        workers: Optional[int] = None,
+        max_size: Optional[int] = None,
+        max_tracked: int = 10000,
+    ):
+        self.handler = handler
+        self.workers = workers or int(os.getenv("TRACECONTEXT_INGEST_WORKERS", 4))
+        if max_size is None:
+            max_size = int(os.getenv("TRACECONTEXT_INGEST_QUEUE_SIZE", 1000))
+        self.max_tracked = max_tracked
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self._statuses: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+
+    def start(self):
+        """Start the worker pool. Safe to call more than once."""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"tracecontext-ingest-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def submit(self, event_id: str, event) -> dict:
+        """Queue an event for processing and return its initial status."""
+        self.start()
+        status = {"event_id": event_id, "status": QUEUED, "submitted_at": time.time()}
+        with self._lock:
+            self._statuses[event_id] = status
+            while len(self._statuses) > self.max_tracked:
+                self._statuses.popitem(last=False)
+        try:
+            self._queue.put_nowait((event_id, event))
+        except queue.Full:
+            with self._lock:
+                self._statuses.pop(event_id, None)
+            raise QueueFullError("Ingestion queue is full")
+        return dict(status)
+
+    def status(self, event_id: str) -> Optional[dict]:
+        with self._lock:
+            status = self._statuses.get(event_id)
+            return dict(status) if status else None
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def join(self):
+        """Block until every queued event has been processed."""
+        self._queue.join()
+
+    def _update(self, event_id: str, **fields):
+        with self._lock:
+            if event_id in self._statuses:
+                self._statuses[event_id].update(fields)
+
+    def _worker(self):
+        while True:
+            event_id, event = self._queue.get()
+            self._update(event_id, status=PROCESSING)
+            try:
+                records = self.handler(event_id, event)
+                self._update(event_id, status=DONE, records=len(records), completed_at=time.time())
+            except Exception as e:
+                logger.exception("Ingestion failed for event [%s]", event_id)
+                self._update(event_id, status=FAILED, error=str(e), completed_at=time.time())
+            finally:
+                self._queue.task_done()
@@ -1,30 +1,231 @@
+import os
+import json
+import time
 import uuid
+import zlib
 import logging
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import Iterator, Optional
 
-from fastapi import FastAPI
-from pydantic import BaseModel
+import numpy as np
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from .db import DatabaseManager
 from .graph import app_graph
+from .ingest import IngestQueue, QueueFullError
+from .response_cache import ResponseCache
 from ..agents.ranker import ContextRanker
+from ..metrics import REGISTRY
+from ..tracing import tracer
+from ..retrieval.bm25 import BM25Index
+from ..retrieval.budget import select_within_budget
+from ..retrieval.cache import TTLCache
+from ..retrieval.embeddings import get_embedder
+from ..retrieval.fusion import reciprocal_rank_fusion
+from ..retrieval.vector import VectorIndex
+from .store import ContextStore, Record
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Reading the store and embedding every record takes seconds on large stores;
+    # do it in the background so the server answers (and /metrics scrapes) meanwhile
+    threading.Thread(target=ensure_loaded, name="tracecontext-store-load", daemon=True).start()
+    yield
+
 
 app = FastAPI(
     title="TraceContext Orchestrator",
     description="Persistent AI coding context platform",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# In-memory context store (used for demo; replace with PostgreSQL/vector DB for production)
-context_store: list[str] = [
-    "[ADR] Title: Use Redis for Caching\nDecision: Accepted\nStatus: Active\nReason: Low latency requirements for context retrieval.",
-    "[DEAD_END] Approach: SQL-based Vector Search\nReason: Too slow under high concurrency.\nAlternative: Use pgvector or a dedicated vector DB.",
+# Demo records seeded into a newly created store, only when TRACECONTEXT_SEED_DEMO is set
+# (run_demo.py and demo_ui.py do, on a throwaway store), so they never enter real history
+SEED_DEMO = os.getenv("TRACECONTEXT_SEED_DEMO", "").lower() in ("1", "true", "yes")
+SEED_RECORDS = [
+    {"type": "ADR", "content": "Title: Use Redis for Caching\nDecision: Accepted\nStatus: Active\nReason: Low latency requirements for context retrieval."},
+    {"type": "DEAD_END", "content": "Approach: SQL-based Vector Search\nReason: Too slow under high concurrency.\nAlternative: Use pgvector or a dedicated vector DB."},
 ]
 
+RERANK_TOP_K = int(os.getenv("TRACECONTEXT_RERANK_TOP_K", 20))
+# "local" keeps retrieval in-process; "postgres" serves it from DATABASE_URL
+RETRIEVAL_BACKEND = os.getenv("TRACECONTEXT_RETRIEVAL_BACKEND", "local")
+SEMANTIC_MIN_SCORE = float(os.getenv("TRACECONTEXT_SEMANTIC_MIN_SCORE", 0.15))
+# Default token budget of GET /context/active
+ACTIVE_CONTEXT_TOKENS = int(os.getenv("TRACECONTEXT_ACTIVE_CONTEXT_TOKENS", 4000))
+# Largest accepted POST /events/batch, in events and in (decompressed) body bytes
+EVENTS_BATCH_MAX = int(os.getenv("TRACECONTEXT_EVENTS_BATCH_MAX", 500))
+EVENTS_BATCH_MAX_BYTES = int(os.getenv("TRACECONTEXT_EVENTS_BATCH_MAX_BYTES", 16 * 1024 * 1024))
+# Records read from the store per page when streaming GET /context?format=ndjson
+STREAM_PAGE_SIZE = int(os.getenv("TRACECONTEXT_STREAM_PAGE_SIZE", 500))
+# Records copied per bulk insert when PostgreSQL is missing part of the store
+PG_SYNC_BATCH = 1000
+
+# Rerank results keyed by normalized query + candidate-set fingerprint
+rerank_cache = TTLCache(
+    max_entries=int(os.getenv("TRACECONTEXT_RERANK_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("TRACECONTEXT_RERANK_CACHE_TTL", 300)),
+)
+ranker = ContextRanker(cache=rerank_cache)
+
+# Durable context store (SQLite, loaded lazily on first use)
+store = ContextStore()
+
+# Keyword and vector indexes over the store, keyed by record id
+search_index = BM25Index()
+embedder = get_embedder()
+vector_index = VectorIndex(embedder.dim)
+
+# Optional PostgreSQL mirror of every stored record and its embedding (requires DATABASE_URL)
+# and Redis cache of /context responses shared across replicas (requires REDIS_HOST)
+db = DatabaseManager(embedding_dim=embedder.dim) if os.getenv("DATABASE_URL") or os.getenv("REDIS_HOST") else None
+response_cache = ResponseCache(db.redis_client if db is not None else None, scope=lambda: store.uid)
+_store_lock = threading.Lock()
+_loaded = False
+# Whether the in-process indexes are built and kept up to date: always with the local
+# backend, and from the first failed PostgreSQL search with the postgres backend
+_local_keyword = False
+_local_vectors = False
+
+EVENT_SECONDS = REGISTRY.histogram("tracecontext_event_seconds", "Time to process one event end to end.", ["type"])
+CONTEXT_SECONDS = REGISTRY.histogram(
+    "tracecontext_context_seconds", "GET /context query latency by stage (retrieval, rerank).", ["stage"],
+)
+# Read only once loaded, so a scrape never triggers (or waits on) the initial load
+REGISTRY.gauge("tracecontext_store_records", "Records in the context store.", fn=lambda: len(store) if _loaded else 0)
+
+
+def _pg_text() -> bool:
+    """True when keyword search is served by PostgreSQL full-text search instead of BM25."""
+    return RETRIEVAL_BACKEND == "postgres" and db is not None and db.pg_pool is not None
+
+
+def _pg_vectors() -> bool:
+    """True when semantic search is served by pgvector instead of the in-process index."""
+    return RETRIEVAL_BACKEND == "postgres" and db is not None and db.vector_enabled
+
+
+def ensure_loaded():
+    """Load persisted records and build the search indexes.
+
+    Started in the background when the server starts; requests arriving earlier
+    wait for it in their worker thread, never on the event loop.
+    """
+    global _loaded
+    if _loaded:
+        return
+    with _store_lock:
+        if _loaded:
+            return
+        records = store.records()
+        if store.created and SEED_DEMO:
+            records = store.append(SEED_RECORDS)
+        _index_locally(keyword=not _pg_text(), vectors=not _pg_vectors())
+        if db is not None and db.pg_pool is not None:
+            _sync_to_postgres(records)
+        _loaded = True
+        logger.info(f"Context store loaded: {len(records)} record(s) from {store.path}")
+
+
+def _index_locally(keyword: bool, vectors: bool):
+    """Build the requested in-process indexes over the whole store, unless already built.
+    The caller holds _store_lock."""
+    global _local_keyword, _local_vectors
+    records = store.records()
+    if keyword and not _local_keyword:
+        for record in records:
+            search_index.add(record.id, record.text)
+        _local_keyword = True
+    if vectors and not _local_vectors:
+        if records:
+            vector_index.add([r.id for r in records], _embeddings(records))
+        _local_vectors = True
+
+
+def _embeddings(records: list[Record]) -> np.ndarray:
+    """Vectors of the given records, in order: read back where the store has them,
+    embedded and saved otherwise (records stored before vectors were, or by another embedder)."""
+    wanted = np.asarray([r.id for r in records], dtype=np.int64)
+    ids, saved = store.vectors(embedder.key, embedder.dim, wanted.tolist())
+    out = np.empty((len(records), embedder.dim), dtype=np.float32)
+    order = np.argsort(ids)
+    have = np.isin(wanted, ids)
+    out[have] = saved[order[np.searchsorted(ids, wanted[have], sorter=order)]]
+    missing = np.flatnonzero(~have)
+    if len(missing):
+        fresh = embedder.embed([records[i].text for i in missing])
+        out[missing] = fresh
+        store.save_vectors(embedder.key, wanted[missing].tolist(), fresh)
+    return out
+
+
+def append_records(chunks: list[dict], repo: str = "", event_id: str = "") -> list[Record]:
+    """Persist graph output chunks and index them in one step."""
+    ensure_loaded()
+    if not chunks:
+        return []
+    vectors = embedder.embed([f"[{c['type']}] {c['content']}" for c in chunks])
+    with _store_lock:
+        records = store.append(chunks, repo=repo, event_id=event_id)
+        store.save_vectors(embedder.key, [r.id for r in records], vectors)
+        if _local_keyword:
+            for record in records:
+                search_index.add(record.id, record.text)
+        if _local_vectors:
+            vector_index.add([r.id for r in records], vectors)
+    if db is not None and db.pg_pool is not None:
+        _mirror_to_postgres(records, vectors)
+    response_cache.bump()
+    return records
+
+
+def _sync_to_postgres(records: list[Record]):
+    """Copy records PostgreSQL is missing (history stored before it was
+    configured, failed mirrors) so database-backed search covers the whole store."""
+    try:
+        present = db.record_ids(store.uid)
+    except Exception as e:
+        logger.warning(f"PostgreSQL sync skipped: {e}")
+        return
+    missing = [r for r in records if r.id not in present]
+    for start in range(0, len(missing), PG_SYNC_BATCH):
+        batch = missing[start:start + PG_SYNC_BATCH]
+        _mirror_to_postgres(batch, _embeddings(batch))
+    if missing:
+        logger.info(f"Copied {len(missing)} record(s) to PostgreSQL")
+
+
+def _mirror_to_postgres(records: list[Record], vectors):
+    """Write records to PostgreSQL in one bulk insert. Failures never block local ingest."""
+    try:
+        db.store_adrs([
+            {
+                "record_id": r.id,
+                "origin": store.uid,
+                "type": r.type,
+                "title": r.content.split("\n", 1)[0],
+                "content": r.content,
+                "repo": r.repo,
+                "metadata": {"event_id": r.event_id},
+                "created_at": r.created_at,
+                "embedding": vector,
+            }
+            for r, vector in zip(records, vectors)
+        ])
+    except Exception as e:
+        logger.warning(f"PostgreSQL mirror failed for {len(records)} record(s): {e}")
+
 
 class Event(BaseModel):
     type: str
@@ -37,54 +238,384 @@ async def root():
     return {"status": "TraceContext Orchestrator Online", "version": "0.1.0"}
 
 
-@app.post("/events")
-async def receive_event(event: Event):
+def process_event(event_id: str, event: Event) -> list[Record]:
+    """Run an event through the agent graph and persist its output. Runs on an ingest worker."""
+    root = tracer.root(event_id)
+    if root is not None:
+        tracer.add_span(event_id, "queue.wait", root.start, time.time())
+    status = "failed"
+    try:
+        with EVENT_SECONDS.time(type=event.type), tracer.activate(event_id):
+            with tracer.span("graph"):
+                result = app_graph.invoke({
+                    "event_type": event.type,
+                    "event_data": event.data,
+                    "context_buffer": [],
+                    "next_step": "",
+                })
+
+            with tracer.span("store.append"):
+                records = append_records(
+                    result.get("context_buffer", []),
+                    repo=event.metadata.get("repo", ""),
+                    event_id=event_id,
+                )
+        status = "done"
+    finally:
+        tracer.finish_trace(event_id, status=status)
+    logger.info(f"Processed event [{event_id}]: {len(records)} record(s) stored")
+    return records
+
+
+ingest_queue = IngestQueue(process_event)
+REGISTRY.gauge("tracecontext_ingest_queue_depth", "Events waiting for an ingest worker.", fn=lambda: ingest_queue.depth)
+
+
+def submit_event(event: Event) -> str:
+    """Open the event's trace and queue it for processing. Raises QueueFullError."""
     event_id = str(uuid.uuid4())
+    received = time.time()
+    tracer.start_trace(event_id, "event", start=received, type=event.type, repo=event.metadata.get("repo", ""))
+    # Spans measured by the client before the event reached us (git hook spool, MCP tool call);
+    # one without an end lasts until the event arrived
+    for span in event.metadata.get("client_spans") or []:
+        try:
+            end = span.get("end")
+            tracer.add_span(event_id, span["name"], float(span["start"]), received if end is None else float(end))
+        except (KeyError, TypeError, ValueError):
+            logger.debug(f"Ignoring malformed client span on event [{event_id}]: {span}")
+    try:
+        ingest_queue.submit(event_id, event)
+    except QueueFullError:
+        tracer.finish_trace(event_id, status="rejected")
+        raise
+    return event_id
+
+
+@app.post("/events", status_code=202)
+async def receive_event(event: Event):
+    try:
+        event_id = submit_event(event)
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Ingestion queue is full, retry later.")
     logger.info(f"Received event [{event_id}]: {event.type}")
+    return {"status": "accepted", "event_id": event_id}
+
+
+EventBatch = TypeAdapter(list[Event])
+
+
+@app.post("/events/batch", status_code=202)
+async def receive_event_batch(request: Request):
+    """Queue many events in one request. The body is a JSON array of events, optionally gzip-encoded."""
+    body = await _read_body(request, EVENTS_BATCH_MAX_BYTES)
+    try:
+        events = EventBatch.validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    if len(events) > EVENTS_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {EVENTS_BATCH_MAX} events per batch.")
+
+    results = []
+    for event in events:
+        try:
+            event_id = submit_event(event)
+            results.append({"event_id": event_id, "status": "accepted"})
+        except QueueFullError:
+            results.append({"event_id": None, "status": "rejected", "detail": "Ingestion queue is full, retry later."})
+    logger.info(f"Received batch of {len(events)} event(s)")
+    return {"status": "accepted", "events": results}
+
+
+async def _read_body(request: Request, max_bytes: int) -> bytes:
+    """Read the body, gunzipping it on the fly when gzip-encoded, and stop with a 413
+    as soon as it exceeds max_bytes, so a small compressed request cannot expand without bound."""
+    gzipped = request.headers.get("content-encoding", "").lower() == "gzip"
+    # 16 + MAX_WBITS: expect a gzip header and trailer
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+    body = bytearray()
+    try:
+        async for chunk in request.stream():
+            if decoder is not None:
+                # Never inflate more than one byte past the cap
+                chunk = decoder.decompress(chunk, max_bytes + 1 - len(body))
+            body += chunk
+            if len(body) > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Batch body exceeds {max_bytes} bytes.")
+        if decoder is not None:
+            body += decoder.flush()
+            if len(body) > max_bytes:
+                raise HTTPException(status_code=413, detail=f"Batch body exceeds {max_bytes} bytes.")
+            if not decoder.eof:
+                raise zlib.error("truncated gzip stream")
+    except zlib.error:
+        raise HTTPException(status_code=400, detail="Invalid gzip body.")
+    return bytes(body)
 
-    result = app_graph.invoke({
-        "event_type": event.type,
-        "event_data": event.data,
-        "context_buffer": [],
-        "next_step": "",
-    })
 
-    # Persist graph output to in-memory store
-    for chunk in result.get("context_buffer", []):
-        context_store.append(f"[{chunk['type']}] {chunk['content']}")
+@app.get("/events/{event_id}")
+async def get_event_status(event_id: str):
+    status = ingest_queue.status(event_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown event: {event_id}")
+    return status
 
-    return {"status": "received", "event_id": event_id}
 
+def retrieve_candidates(query: str, k: int, offset: int = 0) -> list[Record]:
+    """First retrieval stage: fuse keyword and semantic hits, capped at k records.
 
+    `offset` skips that many hits of each retriever, so later pages are read with
+    LIMIT/OFFSET in PostgreSQL. A record both retrievers match at different depths
+    can therefore show up on two pages.
+
+    When nothing matches, the k most recent records are returned instead of the
+    whole store, so the reranker prompt stays bounded as the store grows.
+    """
+    ensure_loaded()
+    query_vector = embedder.embed_one(query)
+    keyword: list[Record] = []
+    semantic: list[Record] = []
+    pg_text, pg_vectors = _pg_text(), _pg_vectors()
+    if pg_text or pg_vectors:
+        import psycopg2
+        try:
+            if pg_text:
+                keyword = _records_from_rows(db.search_text(query, limit=k, offset=offset))
+            if pg_vectors:
+                semantic = _records_from_rows(db.search_similar(query_vector, k, SEMANTIC_MIN_SCORE, offset=offset))
+        except psycopg2.Error as e:
+            # The local store holds every record: answer from in-process indexes instead
+            logger.warning(f"PostgreSQL search failed, falling back to in-process indexes: {e}")
+            keyword, semantic, pg_text, pg_vectors = [], [], False, False
+    with _store_lock:
+        _index_locally(keyword=not pg_text, vectors=not pg_vectors)
+        if not pg_text:
+            hits = search_index.search(query, limit=offset + k)[offset:]
+            keyword = [store.get(doc_id) for doc_id, _ in hits]
+        if not pg_vectors:
+            hits = vector_index.search(query_vector, offset + k, SEMANTIC_MIN_SCORE)[offset:]
+            semantic = [store.get(doc_id) for doc_id, _ in hits]
+
+    by_key = {_record_key(r): r for r in keyword + semantic}
+    keys = reciprocal_rank_fusion([_record_key(r) for r in keyword], [_record_key(r) for r in semantic], limit=k)
+    if not keys:
+        return store.records()[-k:][::-1] if offset == 0 else []
+    return [by_key[key] for key in keys]
+
+
+def _record_key(record: Record) -> str:
+    """Identifies a record across orchestrators: local ids are only unique within one store."""
+    return f"{record.origin}:{record.id}" if record.origin else str(record.id)
+
+
+def _records_from_rows(rows: list[dict]) -> list[Record]:
+    """Build records from PostgreSQL rows. Rows written by another orchestrator keep
+    their origin, so their local record_id never resolves to one of ours."""
+    records = []
+    for row in rows:
+        if row.get("record_id") is None:
+            continue
+        origin = row.get("origin") or ""
+        if not origin:
+            # Written before origins were recorded: no store can claim it, so key it by its row id
+            origin, record_id = "postgres", row["id"]
+        else:
+            record_id = row["record_id"]
+        records.append(Record(
+            id=record_id,
+            type=row["record_type"],
+            content=row["content"],
+            repo=row.get("repo") or "",
+            event_id=row.get("event_id") or "",
+            created_at=float(row.get("created_at") or 0.0),
+            origin="" if origin == store.uid else origin,
+        ))
+    return records
+
+
+# Plain def handlers: retrieval, PostgreSQL and the reranker's LLM call block,
+# so FastAPI runs these in its threadpool instead of on the event loop
 @app.get("/context")
-async def get_context(query: str = ""):
+def get_context(
+    request: Request,
+    query: str = "",
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[int] = Query(None, ge=0),
+    record_type: Optional[str] = Query(None, alias="type"),
+    repo: Optional[str] = None,
+    since: Optional[float] = None,
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+):
+    params = {
+        "query": query, "limit": limit, "cursor": cursor, "type": record_type,
+        "repo": repo, "since": since, "format": response_format,
+    }
+    version = response_cache.version()
+    etag = response_cache.etag(version, params)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    if response_format == "ndjson":
+        if query:
+            records = rank_records(query, limit, cursor)
+        else:
+            records = stream_records(record_type, repo, since, limit, cursor)
+        return StreamingResponse(
+            (json.dumps(asdict(r)) + "\n" for r in records),
+            media_type="application/x-ndjson",
+            headers={"ETag": etag},
+        )
+
+    body = response_cache.get_or_compute(
+        params, lambda: build_context(query, limit, record_type, repo, since, cursor), version=version,
+    )
+    return JSONResponse(body, headers={"ETag": etag})
+
+
+@app.get("/context/active")
+def get_active_context(
+    request: Request,
+    budget: int = Query(ACTIVE_CONTEXT_TOKENS, ge=1),
+    repo: Optional[str] = None,
+    paths: list[str] = Query([], alias="path"),
+):
+    """The most useful records for a new session, packed into a token budget."""
+    params = {"active": True, "budget": budget, "repo": repo, "paths": sorted(paths)}
+    version = response_cache.version()
+    etag = response_cache.etag(version, params)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    body = response_cache.get_or_compute(
+        params, lambda: build_active_context(budget, repo, paths), version=version,
+    )
+    return JSONResponse(body, headers={"ETag": etag})
+
+
+def build_active_context(budget: int, repo: Optional[str] = None, paths: list[str] = ()) -> dict:
+    ensure_loaded()
+    records = store.records()
+    selected, used = select_within_budget(records, budget, repo=repo, paths=paths)
+    return {
+        "context": [r.text for r in selected],
+        "tokens": used,
+        "budget": budget,
+        "omitted": len(records) - len(selected),
+    }
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def stream_records(
+    record_type: Optional[str] = None,
+    repo: Optional[str] = None,
+    since: Optional[float] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[int] = None,
+) -> Iterator[Record]:
+    """Yield matching records oldest first, reading the store one page at a time."""
+    ensure_loaded()
+    remaining = limit
+    while remaining is None or remaining > 0:
+        page_size = STREAM_PAGE_SIZE if remaining is None else min(STREAM_PAGE_SIZE, remaining)
+        page = store.query(type=record_type, repo=repo, since=since, limit=page_size, after=cursor)
+        yield from page
+        if len(page) < page_size:
+            return
+        cursor = page[-1].id
+        if remaining is not None:
+            remaining -= len(page)
+
+
+def build_context(
+    query: str = "",
+    limit: Optional[int] = None,
+    record_type: Optional[str] = None,
+    repo: Optional[str] = None,
+    since: Optional[float] = None,
+    cursor: Optional[int] = None,
+) -> dict:
     if not query:
-        return {"context": context_store}
+        ensure_loaded()
+        # Read one extra record to know whether another page follows
+        fetch = limit + 1 if limit is not None else None
+        if record_type or repo or since is not None or cursor is not None:
+            records = store.query(type=record_type, repo=repo, since=since, limit=fetch, after=cursor)
+        else:
+            records = store.records()[:fetch]
+        next_cursor = None
+        if limit is not None and len(records) > limit:
+            records = records[:limit]
+            next_cursor = records[-1].id
+        return {"context": [r.text for r in records], "next_cursor": next_cursor}
+
+    records = rank_records(query, limit, cursor)
+    # The first page reranks at most RERANK_TOP_K candidates; later pages `limit` each
+    page_size = limit or RERANK_TOP_K
+    if cursor is None:
+        page_size = min(page_size, RERANK_TOP_K)
+    next_cursor = (cursor or 0) + page_size if len(records) == page_size else None
+    return {"context": [r.text for r in records], "query": query, "next_cursor": next_cursor}
+
 
-    # Keyword filter first
-    filtered = [c for c in context_store if query.lower() in c.lower()]
-    candidates = filtered or context_store
+def rank_records(query: str, limit: Optional[int] = None, cursor: Optional[int] = None) -> list[Record]:
+    """Retrieve candidates for a query and rerank them with the ContextRanker.
 
-    # Re-rank by relevance using ContextRanker when a query is given
+    Without a cursor the best `limit` of the top RERANK_TOP_K candidates are
+    returned, and the next page starts at retrieval offset `limit`. With one, the
+    query is paged: `cursor` is the retrieval offset and each page holds `limit`
+    (default RERANK_TOP_K) reranked candidates. A record the first page's rerank
+    lifted from deeper than `limit` can show up again on the second page.
+    """
+    with CONTEXT_SECONDS.time(stage="retrieval"):
+        if cursor is None:
+            candidates = retrieve_candidates(query, RERANK_TOP_K)
+        else:
+            candidates = retrieve_candidates(query, limit or RERANK_TOP_K, offset=cursor)
+
+    # Re-rank the bounded candidate set by relevance using ContextRanker
     try:
-        ranker = ContextRanker()
-        chunks = [{"id": str(i), "content": c} for i, c in enumerate(candidates)]
-        ranking = ranker.rank(task_description=query, context_chunks=chunks)
-        scored = sorted(
-            zip(ranking.scores, candidates),
-            key=lambda x: x[0].relevance_score,
-            reverse=True,
-        )
-        ranked_results = [c for _, c in scored]
-        return {"context": ranked_results, "query": query}
+        with CONTEXT_SECONDS.time(stage="rerank"):
+            chunks = [{"id": _record_key(r), "content": r.text} for r in candidates]
+            ranking = ranker.rank(task_description=query, context_chunks=chunks)
+        scores = {s.id: s.relevance_score for s in ranking.scores}
+        candidates = sorted(candidates, key=lambda r: scores.get(_record_key(r), 0.0), reverse=True)
     except Exception as exc:
         logger.warning("Ranker failed, returning unranked results: %s", exc)
-        return {"context": candidates, "query": query}
+
+    return candidates[:limit]
+
+
+@app.get("/debug/events/{event_id}/trace")
+async def get_event_trace(event_id: str):
+    """Span timeline of one event, from the client through the graph to the store."""
+    view = tracer.view(event_id)
+    if view is None:
+        raise HTTPException(status_code=404, detail=f"No trace for event: {event_id}")
+    return view
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of latency histograms, LLM usage and queue/store gauges."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.post("/reset")
-async def reset_context():
-    context_store.clear()
+def reset_context():
+    ensure_loaded()
+    with _store_lock:
+        store.clear()
+        search_index.clear()
+        vector_index.clear()
+        rerank_cache.clear()
+    if db is not None and db.pg_pool is not None:
+        db.clear()
+    response_cache.bump()
     return {"status": "ok", "message": "Context store cleared"}
 
 
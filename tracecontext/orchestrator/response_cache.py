@@ -0,0 +1,115 @@
+"""
+ResponseCache — Redis read-through cache for GET /context responses.
+
+Keys embed a store version that is bumped whenever records are stored or the
+store is reset. Invalidation is therefore a single INCR shared by every
+orchestrator replica; stale entries are simply never read again and expire
+on their TTL. Without Redis the version is kept in-process and responses are
+computed on every call.
+
+The version also backs the ETag of every /context response, so clients can
+revalidate with If-None-Match and get 304 while nothing has been stored.
+
+Responses and ETags are scoped to the store they were computed from (the
+store's uid): replicas share cached bodies only when they open the same store
+file, and orchestrators with separate stores on one Redis never serve each
+other's responses. The version stays shared, so a write anywhere invalidates
+every scope.
+
+Configure with:
+    TRACECONTEXT_CONTEXT_CACHE_TTL  seconds a cached response lives (default 300)
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        client=None,
+        ttl: Optional[int] = None,
+        prefix: str = "tracecontext:context",
+        scope: Callable[[], str] = lambda: "",
+    ):
+        self.client = client
+        self.ttl = ttl if ttl is not None else int(os.getenv("TRACECONTEXT_CONTEXT_CACHE_TTL", 300))
+        self.prefix = prefix
+        # Resolved on first use: reading the store's uid opens its database
+        self._scope_fn = scope
+        self._scope: Optional[str] = None
+        # Seeded from the clock so in-process versions keep increasing across restarts
+        self._version = time.time_ns()
+        self._lock = threading.Lock()
+
+    @property
+    def version_key(self) -> str:
+        return f"{self.prefix}:version"
+
+    def version(self) -> int:
+        """Current store version; shared through Redis when it is available."""
+        if self.client is not None:
+            try:
+                value = self.client.get(self.version_key)
+                if value is None:
+                    # A fresh (or flushed) Redis continues from the clock, never from 0
+                    self.client.set(self.version_key, self._version, nx=True)
+                    value = self.client.get(self.version_key)
+                return int(value)
+            except Exception as e:
+                logger.warning(f"Redis version read failed: {e}")
+        return self._version
+
+    def bump(self) -> int:
+        """Invalidate every cached response by moving to a new store version."""
+        with self._lock:
+            self._version += 1
+        if self.client is not None:
+            try:
+                return int(self.client.incr(self.version_key))
+            except Exception as e:
+                logger.warning(f"Redis version bump failed: {e}")
+        return self._version
+
+    @property
+    def scope(self) -> str:
+        if self._scope is None:
+            self._scope = self._scope_fn()
+        return self._scope
+
+    def digest(self, params: dict) -> str:
+        payload = json.dumps([self.scope, params], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def key(self, version: int, params: dict) -> str:
+        return f"{self.prefix}:v{version}:{self.digest(params)}"
+
+    def etag(self, version: int, params: dict) -> str:
+        """Strong validator for the response to params at a store version."""
+        return f'"{version}-{self.digest(params)[:16]}"'
+
+    def get_or_compute(self, params: dict, compute: Callable[[], dict], version: Optional[int] = None) -> dict:
+        """Return the cached response for params at the given (default: current) version,
+        computing it on a miss."""
+        if self.client is None:
+            return compute()
+        key = self.key(self.version() if version is None else version, params)
+        try:
+            cached = self.client.get(key)
+            if cached is not None:
+                return json.loads(cached)
+        except Exception as e:
+            logger.warning(f"Redis read failed, serving uncached: {e}")
+        response = compute()
+        try:
+            self.client.set(key, json.dumps(response), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Redis write failed: {e}")
+        return response
@@ -0,0 +1,237 @@
+"""
+ContextStore — durable embedded storage for context records.
+
+Records are persisted to a local SQLite database in WAL mode, so history
+survives restarts without any external service, and readers never block on
+the ingest writer. The full record list is loaded lazily on first access and
+kept in memory, also when search is served by PostgreSQL; filtered reads by
+type, repo and time go straight to indexed SQL. Record embeddings are saved
+next to the records, keyed by embedder, so a restart reads them back instead
+of embedding the whole store again.
+
+Configure with:
+    TRACECONTEXT_DB_PATH  database file (default ~/.tracecontext/context.db)
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    type       TEXT NOT NULL,
+    content    TEXT NOT NULL,
+    repo       TEXT NOT NULL DEFAULT '',
+    event_id   TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_type ON records (type, created_at);
+CREATE INDEX IF NOT EXISTS records_repo ON records (repo, created_at);
+CREATE INDEX IF NOT EXISTS records_created ON records (created_at);
+CREATE TABLE IF NOT EXISTS embeddings (
+    record_id INTEGER PRIMARY KEY,
+    embedder  TEXT NOT NULL,
+    vector    BLOB NOT NULL
+);
+""" + META_SCHEMA
+
+
+@dataclass(frozen=True)
+class Record:
+    id: int
+    type: str
+    content: str
+    repo: str = ""
+    event_id: str = ""
+    created_at: float = 0.0
+    # Store uid of a record read from a shared PostgreSQL database that another
+    # orchestrator wrote; empty for records of the local store
+    origin: str = ""
+
+    @property
+    def text(self) -> str:
+        """The record as served by GET /context, e.g. "[ADR] Title: ..."."""
+        return f"[{self.type}] {self.content}"
+
+
+class ContextStore:
+    def __init__(self, path: Optional[str] = None):
+        self.path = os.path.expanduser(path or os.getenv(
+            "TRACECONTEXT_DB_PATH",
+            os.path.join("~", ".tracecontext", "context.db"),
+        ))
+        self.created = False
+        self._records: Optional[list[Record]] = None
+        self._by_id: dict[int, Record] = {}
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._shared: Optional[sqlite3.Connection] = None
+        self._uid: Optional[str] = None
+
+    # -- connections -------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers proceed while a write is in progress."""
+        if self.path == ":memory:":
+            # An in-memory database only exists on the connection that created it
+            if self._shared is None:
+                self._shared = sqlite3.connect(self.path, check_same_thread=False)
+            return self._shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _load(self) -> list[Record]:
+        if self._records is None:
+            with self._write_lock:
+                if self._records is None:
+                    conn = self._connect()
+                    self.created = conn.execute(
+                        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'records'"
+                    ).fetchone() is None
+                    conn.executescript(SCHEMA)
+                    rows = conn.execute(
+                        "SELECT id, type, content, repo, event_id, created_at FROM records ORDER BY id"
+                    ).fetchall()
+                    records = [Record(*row) for row in rows]
+                    self._by_id = {r.id: r for r in records}
+                    self._records = records
+        return self._records
+
+    # -- reads -------------------------------------------------------------
+
+    def records(self) -> list[Record]:
+        """All records, oldest first. Loads the database on first call."""
+        return self._load()
+
+    @property
+    def uid(self) -> str:
+        """Random id of this database, generated once and shared by every process opening the file."""
+        if self._uid is None:
+            # Only the meta table: reading the uid never loads the records
+            with self._write_lock:
+                conn = self._connect()
+                conn.executescript(META_SCHEMA)
+                with conn:
+                    conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('uid', ?)", (uuid.uuid4().hex,))
+                self._uid = conn.execute("SELECT value FROM meta WHERE key = 'uid'").fetchone()[0]
+        return self._uid
+
+    def vectors(self, embedder: str, dim: int, ids: list[int]) -> tuple[np.ndarray, np.ndarray]:
+        """Saved vectors of the given records made by `embedder`, as (record ids, (n, dim) float32 matrix).
+        Records without one are left out."""
+        self._load()
+        conn = self._connect()
+        found, blobs = [], []
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(ids), 900):
+            chunk = ids[start:start + 900]
+            rows = conn.execute(
+                f"SELECT record_id, vector FROM embeddings WHERE embedder = ? "
+                f"AND record_id IN ({', '.join('?' * len(chunk))})",
+                [embedder, *chunk],
+            ).fetchall()
+            for record_id, blob in rows:
+                found.append(record_id)
+                blobs.append(blob)
+        matrix = np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(-1, dim)
+        return np.asarray(found, dtype=np.int64), matrix
+
+    def get(self, record_id: int) -> Optional[Record]:
+        self._load()
+        return self._by_id.get(record_id)
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def query(
+        self,
+        type: Optional[str] = None,
+        repo: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> list[Record]:
+        """Indexed read of records matching all given filters, oldest first.
+
+        `after` is a record id cursor: only records with a larger id are returned.
+        """
+        self._load()
+        clauses, params = [], []
+        for column, op, value in (
+            ("type", "=", type), ("repo", "=", repo),
+            ("created_at", ">=", since), ("created_at", "<", until),
+            ("id", ">", after),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        sql = "SELECT id, type, content, repo, event_id, created_at FROM records"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [Record(*row) for row in self._connect().execute(sql, params).fetchall()]
+
+    # -- writes ------------------------------------------------------------
+
+    def append(self, chunks: list[dict], repo: str = "", event_id: str = "") -> list[Record]:
+        """Persist graph output chunks ({"type", "content"}) and return the stored records."""
+        self._load()
+        now = time.time()
+        with self._write_lock:
+            conn = self._connect()
+            stored = []
+            with conn:
+                for chunk in chunks:
+                    cur = conn.execute(
+                        "INSERT INTO records (type, content, repo, event_id, created_at) VALUES (?, ?, ?, ?, ?)",
+                        (chunk["type"], chunk["content"], repo or "", event_id or "", now),
+                    )
+                    stored.append(Record(cur.lastrowid, chunk["type"], chunk["content"], repo or "", event_id or "", now))
+            self._records.extend(stored)
+            self._by_id.update((r.id, r) for r in stored)
+            return stored
+
+    def save_vectors(self, embedder: str, ids: list[int], vectors: np.ndarray):
+        """Persist the vectors `embedder` produced for the given records."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (record_id, embedder, vector) VALUES (?, ?, ?)",
+                    [(int(record_id), embedder, vector.tobytes()) for record_id, vector in zip(ids, vectors)],
+                )
+
+    def clear(self):
+        self._load()
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM records")
+                conn.execute("DELETE FROM embeddings")
+            self._records.clear()
+            self._by_id.clear()
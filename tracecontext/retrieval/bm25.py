@@ -0,0 +1,75 @@
+"""
+BM25Index — incrementally maintained inverted index with Okapi BM25 scoring.
+
+Documents are added one at a time as records land in the context store, so a
+query only touches the postings of its own terms instead of scanning every
+stored record.
+"""
+
+import math
+import re
+import heapq
+import threading
+from collections import defaultdict
+from typing import Optional
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, dict[int, int]] = defaultdict(dict)
+        self.doc_lengths: dict[int, int] = {}
+        self.total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, doc_id: int, text: str):
+        tokens = tokenize(text)
+        counts: dict[str, int] = defaultdict(int)
+        for token in tokens:
+            counts[token] += 1
+        with self._lock:
+            if doc_id in self.doc_lengths:
+                raise ValueError(f"Document {doc_id} is already indexed")
+            for term, tf in counts.items():
+                self.postings[term][doc_id] = tf
+            self.doc_lengths[doc_id] = len(tokens)
+            self.total_length += len(tokens)
+
+    def clear(self):
+        with self._lock:
+            self.postings.clear()
+            self.doc_lengths.clear()
+            self.total_length = 0
+
+    def search(self, query: str, limit: Optional[int] = None) -> list[tuple[int, float]]:
+        """Return (doc_id, score) pairs for documents matching any query term, best first."""
+        terms = set(tokenize(query))
+        scores: dict[int, float] = defaultdict(float)
+        with self._lock:
+            n_docs = len(self.doc_lengths)
+            if not n_docs or not terms:
+                return []
+            avg_length = self.total_length / n_docs or 1.0
+            for term in terms:
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        if limit is None:
+            return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        return heapq.nlargest(limit, scores.items(), key=lambda x: x[1])
@@ -0,0 +1,54 @@
+"""
+Token-budgeted context selection for session start.
+
+Records are scored by how useful they are to a fresh session — dead-ends
+first, then decisions, favouring recent records and records matching the
+repo or file paths being worked on — and packed greedily into a token budget
+using the same cheap estimator as diff chunking.
+"""
+
+import os
+import time
+from typing import Iterable, Optional, Sequence
+
+from ..agents.chunking import estimate_tokens
+
+TYPE_WEIGHTS = {"DEAD_END": 1.5, "ADR": 1.0}
+DEFAULT_TYPE_WEIGHT = 0.8
+# Recency weight halves every this many days
+HALF_LIFE_DAYS = float(os.getenv("TRACECONTEXT_CONTEXT_HALF_LIFE_DAYS", 30))
+
+
+def score(record, repo: Optional[str] = None, paths: Sequence[str] = (), now: Optional[float] = None) -> float:
+    now = time.time() if now is None else now
+    age_days = max(now - record.created_at, 0.0) / 86400
+    value = TYPE_WEIGHTS.get(record.type, DEFAULT_TYPE_WEIGHT) * (0.5 + 0.5 ** (age_days / HALF_LIFE_DAYS))
+    if repo and record.repo:
+        value *= 2.0 if record.repo == repo else 0.5
+    if paths:
+        content = record.content.lower()
+        hits = sum(1 for p in paths if p and (p.lower() in content or os.path.basename(p).lower() in content))
+        value *= 1 + hits
+    return value
+
+
+def select_within_budget(
+    records: Iterable,
+    budget: int,
+    repo: Optional[str] = None,
+    paths: Sequence[str] = (),
+    now: Optional[float] = None,
+) -> tuple[list, int]:
+    """Highest-scoring records whose texts fit in budget tokens, best first.
+
+    Returns (selected records, tokens used). Records too large for the space
+    left are skipped so smaller, lower-scored ones can still fill it.
+    """
+    ranked = sorted(records, key=lambda r: score(r, repo, paths, now), reverse=True)
+    selected, used = [], 0
+    for record in ranked:
+        cost = estimate_tokens(record.text)
+        if used + cost <= budget:
+            selected.append(record)
+            used += cost
+    return selected, used
@@ -0,0 +1,86 @@
+"""
+Embedders turn context records into dense vectors for semantic retrieval.
+
+The default HashingEmbedder is fully local: it hashes word and character
+n-grams into a fixed number of buckets (the "hashing trick"), so related
+records such as "cache"/"caching" or "pgvector"/"vector DB" land close
+together without any model download or network call.
+
+Plug in a different embedder with TRACECONTEXT_EMBEDDER, either "hashing"
+or an import path such as "mypackage.embed:MyEmbedder". Custom embedders
+subclass Embedder and implement `embed`.
+"""
+
+import os
+import math
+import zlib
+import importlib
+from collections import defaultdict
+
+import numpy as np
+
+from .bm25 import tokenize
+
+# Record field labels and common function words carry no meaning for similarity
+STOPWORDS = frozenset("""
+    a an and are as at be by for from in is it of on or that the this to was were with
+    adr dead_end title decision status reason approach alternative map_update
+""".split())
+
+
+class Embedder:
+    dim: int
+
+    @property
+    def key(self) -> str:
+        """Names the vector space, so persisted vectors are only reused by the same embedder."""
+        return f"{type(self).__module__}.{type(self).__qualname__}/{self.dim}"
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Return an (len(texts), dim) float32 array of L2-normalized vectors."""
+        raise NotImplementedError
+
+    def embed_one(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+
+class HashingEmbedder(Embedder):
+    def __init__(self, dim: int = None, char_ngram: int = 3):
+        self.dim = dim or int(os.getenv("TRACECONTEXT_EMBEDDING_DIM", 256))
+        self.char_ngram = char_ngram
+
+    def _features(self, text: str) -> dict[str, float]:
+        features: dict[str, float] = defaultdict(float)
+        n = self.char_ngram
+        for word in tokenize(text):
+            if word in STOPWORDS or len(word) < 2 or word.isdigit():
+                continue
+            features[f"w:{word}"] += 1.0
+            padded = f"<{word}>"
+            for j in range(len(padded) - n + 1):
+                features[f"c:{padded[j:j + n]}"] += 0.5
+        return features
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            vec = out[row]
+            for feature, weight in self._features(text).items():
+                h = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if h & 0x80000000 else -1.0
+                vec[h % self.dim] += sign * math.log1p(weight)
+            norm = np.linalg.norm(vec)
+            if norm:
+                vec /= norm
+        return out
+
+
+def get_embedder(name: str = None) -> Embedder:
+    """Build the embedder named by `name` or TRACECONTEXT_EMBEDDER."""
+    name = name or os.getenv("TRACECONTEXT_EMBEDDER", "hashing")
+    if name == "hashing":
+        return HashingEmbedder()
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown embedder '{name}'. Use 'hashing' or 'package.module:Class'.")
+    return getattr(importlib.import_module(module_name), class_name)()
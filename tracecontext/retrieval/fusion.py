@@ -0,0 +1,16 @@
+"""
+Rank fusion for combining keyword and semantic result lists.
+"""
+
+from collections import defaultdict
+from typing import Optional
+
+
+def reciprocal_rank_fusion(*rankings: list[int], k: int = 60, limit: Optional[int] = None) -> list[int]:
+    """Merge ranked id lists with Reciprocal Rank Fusion (score = sum of 1 / (k + rank))."""
+    scores: dict[int, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    fused = sorted(scores, key=scores.get, reverse=True)
+    return fused[:limit] if limit is not None else fused
@@ -0,0 +1,75 @@
+"""
+VectorIndex — in-memory dense vector index with batched top-k search.
+
+Vectors live in one contiguous float32 matrix that grows by doubling, so a
+query is a single matrix-vector product followed by an argpartition. With
+L2-normalized vectors the dot product is cosine similarity.
+"""
+
+import threading
+from typing import Optional
+
+import numpy as np
+
+
+class VectorIndex:
+    def __init__(self, dim: int, capacity: int = 1024):
+        self.dim = dim
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, ids: list[int], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length")
+        with self._lock:
+            needed = self._size + len(ids)
+            if needed > len(self._vectors):
+                capacity = max(needed, 2 * len(self._vectors))
+                grown = np.zeros((capacity, self.dim), dtype=np.float32)
+                grown[:self._size] = self._vectors[:self._size]
+                grown_ids = np.zeros(capacity, dtype=np.int64)
+                grown_ids[:self._size] = self._ids[:self._size]
+                self._vectors, self._ids = grown, grown_ids
+            self._vectors[self._size:needed] = vectors
+            self._ids[self._size:needed] = ids
+            self._size = needed
+
+    def clear(self):
+        with self._lock:
+            self._size = 0
+
+    def search(self, query: np.ndarray, k: int = 10, min_score: Optional[float] = None) -> list[tuple[int, float]]:
+        return self.search_batch(np.asarray(query).reshape(1, -1), k, min_score)[0]
+
+    def search_batch(self, queries: np.ndarray, k: int = 10, min_score: Optional[float] = None) -> list[list[tuple[int, float]]]:
+        """Top-k (id, score) pairs for each row of `queries`, best first."""
+        with self._lock:
+            # Rows below _size are never rewritten, so the snapshot stays valid after release
+            size = self._size
+            vectors, ids = self._vectors[:size], self._ids[:size]
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        if not size or k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        scores = queries @ vectors.T
+        k = min(k, size)
+        if k < size:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(size), (len(queries), size))
+        results = []
+        for row, candidates in enumerate(top):
+            row_scores = scores[row, candidates]
+            order = np.argsort(-row_scores)
+            results.append([
+                (int(ids[candidates[i]]), float(row_scores[i]))
+                for i in order
+                if min_score is None or row_scores[i] >= min_score
+            ])
+        return results
@@ -0,0 +1,185 @@
+"""
+Commit spool — offline buffer between the git post-commit hook and the orchestrator.
+
+The hook installed by `tracecontext init` only appends one line per commit to
+`.git/tracecontext/spool`:
+
+    <commit sha>\t<unix timestamp>\t<user>
+
+so commits never wait on Python or the network. `tracecontext flush` (which
+the hook also starts in the background) claims the spool by renaming it,
+resolves each commit's message and diff from git, and uploads the events in
+gzip-compressed batches (POST /events/batch) with retry. Anything that cannot
+be delivered stays spooled for the next flush, so nothing is lost while the
+orchestrator is down.
+
+Configure with:
+    TRACECONTEXT_FLUSH_BATCH_SIZE  events uploaded per batch (default 50)
+    TRACECONTEXT_FLUSH_RETRIES     attempts per batch before giving up (default 3)
+"""
+
+import os
+import gzip
+import json
+import time
+import glob
+import logging
+import subprocess
+from typing import Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+SPOOL_FILE = "spool"
+LOCK_FILE = "flush.lock"
+# A lock older than this belongs to a flusher that died without cleaning up
+STALE_LOCK_SECONDS = 600
+
+
+def _git(*args: str, cwd: Optional[str] = None) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, capture_output=True, text=True, encoding="utf-8", errors="replace", check=True,
+    ).stdout
+
+
+def spool_dir(cwd: Optional[str] = None) -> str:
+    git_dir = _git("rev-parse", "--git-dir", cwd=cwd).strip()
+    return os.path.join(cwd or os.getcwd(), git_dir, "tracecontext")
+
+
+def pending(directory: str) -> list[str]:
+    """Spooled lines not yet delivered, oldest first."""
+    lines = []
+    for path in _spool_files(directory):
+        with open(path, encoding="utf-8") as f:
+            lines.extend(line.rstrip("\n") for line in f if line.strip())
+    return lines
+
+
+def _spool_files(directory: str) -> list[str]:
+    # Claimed files from earlier (interrupted) flushes go first to keep commit order
+    claimed = sorted(glob.glob(os.path.join(directory, SPOOL_FILE + ".*.inflight")), key=os.path.getmtime)
+    live = os.path.join(directory, SPOOL_FILE)
+    return claimed + ([live] if os.path.exists(live) else [])
+
+
+def _acquire_lock(directory: str) -> Optional[str]:
+    path = os.path.join(directory, LOCK_FILE)
+    try:
+        if time.time() - os.path.getmtime(path) > STALE_LOCK_SECONDS:
+            os.remove(path)
+    except OSError:
+        pass
+    try:
+        os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return path
+    except FileExistsError:
+        return None
+
+
+def build_event(line: str, cwd: Optional[str] = None, repo: str = "") -> Optional[dict]:
+    """Turn a spooled line back into a git_commit event. Returns None if the commit is gone."""
+    sha, timestamp, user = (line.split("\t") + ["", ""])[:3]
+    try:
+        message = _git("log", "-1", "--pretty=%B", sha, cwd=cwd).strip()
+        diff = _git("show", "--format=", sha, cwd=cwd)
+    except subprocess.CalledProcessError:
+        logger.warning(f"Dropping spooled commit {sha}: not found in this repository")
+        return None
+    return {
+        "type": "git_commit",
+        "data": {"message": message, "diff": diff},
+        "metadata": {"repo": repo, "user": user, "commit": sha, "committed_at": timestamp},
+    }
+
+
+def _spool_span(committed_at: str) -> list[dict]:
+    try:
+        return [{"name": "hook.spooled", "start": float(committed_at), "end": time.time()}]
+    except ValueError:
+        return []
+
+
+def _send_batch(session: requests.Session, url: str, events: list[dict], retries: int) -> list[dict]:
+    """Deliver events in one gzip-compressed POST /events/batch, retrying with backoff.
+
+    Events the orchestrator rejects (queue full) are resent on the next attempt.
+    Returns the events still undelivered once retries are exhausted, never ones
+    already accepted, so callers keep exactly those for later.
+    """
+    for attempt in range(retries):
+        if attempt:
+            time.sleep(2 ** (attempt - 1))
+        try:
+            r = session.post(
+                f"{url}/events/batch",
+                data=gzip.compress(json.dumps(events).encode("utf-8")),
+                headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+                timeout=30,
+            )
+            r.raise_for_status()
+            results = r.json().get("events", [])
+            events = [e for e, res in zip(events, results) if res.get("status") == "rejected"]
+            if not events:
+                return []
+        except (requests.RequestException, ValueError) as e:
+            logger.debug(f"Batch upload attempt {attempt + 1} failed: {e}")
+    return events
+
+
+def flush(
+    url: str,
+    cwd: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    retries: Optional[int] = None,
+) -> tuple[int, int]:
+    """Upload every spooled commit. Returns (sent, still pending)."""
+    batch_size = batch_size or int(os.getenv("TRACECONTEXT_FLUSH_BATCH_SIZE", 50))
+    retries = retries or int(os.getenv("TRACECONTEXT_FLUSH_RETRIES", 3))
+    directory = spool_dir(cwd)
+    if not os.path.isdir(directory):
+        return 0, 0
+    lock = _acquire_lock(directory)
+    if lock is None:
+        # Another flusher is already draining the spool
+        return 0, len(pending(directory))
+
+    try:
+        live = os.path.join(directory, SPOOL_FILE)
+        if os.path.exists(live):
+            # The hook keeps appending to a fresh spool file while this one is uploaded
+            os.replace(live, os.path.join(directory, f"{SPOOL_FILE}.{time.time_ns()}.inflight"))
+        try:
+            repo = _git("config", "--get", "remote.origin.url", cwd=cwd).strip()
+        except subprocess.CalledProcessError:
+            repo = ""
+
+        sent = 0
+        with requests.Session() as session:
+            for path in _spool_files(directory):
+                if path == live:
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    lines = [line.rstrip("\n") for line in f if line.strip()]
+                for start in range(0, len(lines), batch_size):
+                    batch = lines[start:start + batch_size]
+                    spooled = [(line, build_event(line, cwd, repo)) for line in batch]
+                    spooled = [(line, e) for line, e in spooled if e is not None]
+                    for _, event in spooled:
+                        # Time the commit spent spooled shows up in the event's trace
+                        event["metadata"]["client_spans"] = _spool_span(event["metadata"]["committed_at"])
+                    undelivered = _send_batch(session, url, [e for _, e in spooled], retries) if spooled else []
+                    sent += len(spooled) - len(undelivered)
+                    if undelivered:
+                        # Only what the orchestrator did not accept stays spooled, so nothing is stored twice
+                        failed = {id(e) for e in undelivered}
+                        keep = [line for line, e in spooled if id(e) in failed] + lines[start + batch_size:]
+                        logger.warning(f"Flush stopped, {len(keep)} commit(s) stay spooled")
+                        with open(path, "w", encoding="utf-8") as f:
+                            f.writelines(line + "\n" for line in keep)
+                        return sent, len(pending(directory))
+                os.remove(path)
+        return sent, len(pending(directory))
+    finally:
+        os.remove(lock)
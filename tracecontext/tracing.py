@@ -0,0 +1,221 @@
+"""
+Tracing — per-event spans through the ingest pipeline.
+
+Every event accepted by POST /events gets a trace keyed by its event_id.
+Spans cover the client side (git hook spool wait, MCP tool call, sent in the
+event's `metadata["client_spans"]`; a client span without an `end` is closed
+when the event arrives), the ingest queue wait, each LangGraph
+node, each agent LLM call and the store append, so the time between a commit
+and its record showing up in search can be broken down.
+
+Recent traces are kept in memory for GET /debug/events/{event_id}/trace.
+Finished traces can also be exported:
+
+    TRACECONTEXT_TRACE_FILE      append spans as JSON lines to this file
+    TRACECONTEXT_OTLP_ENDPOINT   POST spans as OTLP/HTTP JSON (e.g. http://localhost:4318/v1/traces)
+    TRACECONTEXT_TRACE_MAX       traces kept in memory (default 1000)
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    trace_id: str
+    name: str
+    start: float
+    end: Optional[float] = None
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    parent_id: Optional[str] = None
+    attributes: dict = field(default_factory=dict)
+
+
+# (trace_id, span_id) of the span new child spans attach to
+_current: contextvars.ContextVar = contextvars.ContextVar("tracecontext_span", default=None)
+
+
+class Tracer:
+    def __init__(self, max_traces: Optional[int] = None):
+        self.max_traces = max_traces or int(os.getenv("TRACECONTEXT_TRACE_MAX", 1000))
+        trace_file = os.getenv("TRACECONTEXT_TRACE_FILE")
+        self.trace_file = os.path.expanduser(trace_file) if trace_file else None
+        self.otlp_endpoint = os.getenv("TRACECONTEXT_OTLP_ENDPOINT")
+        self._traces: "OrderedDict[str, list[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # -- recording ---------------------------------------------------------
+
+    def _record(self, span: Span):
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            spans.append(span)
+
+    def start_trace(self, trace_id: str, name: str, start: Optional[float] = None, **attributes) -> Span:
+        """Open the root span of a trace. It is closed by `finish_trace`."""
+        root = Span(trace_id, name, start or time.time(), attributes=attributes)
+        self._record(root)
+        return root
+
+    def add_span(
+        self, trace_id: str, name: str, start: float, end: float,
+        parent_id: Optional[str] = None, **attributes,
+    ) -> Span:
+        """Record an already finished span, e.g. one measured by a client."""
+        if parent_id is None:
+            root = self.root(trace_id)
+            parent_id = root.span_id if root else None
+        span = Span(trace_id, name, start, end, parent_id=parent_id, attributes=attributes)
+        self._record(span)
+        return span
+
+    def add_current_span(self, name: str, start: float, end: float, **attributes) -> Optional[Span]:
+        """Record an already finished span as a child of the current span. A no-op outside an active trace."""
+        current = _current.get()
+        if current is None:
+            return None
+        return self.add_span(current[0], name, start, end, parent_id=current[1], **attributes)
+
+    def root(self, trace_id: str) -> Optional[Span]:
+        with self._lock:
+            spans = self._traces.get(trace_id)
+            return spans[0] if spans else None
+
+    @contextmanager
+    def activate(self, trace_id: str):
+        """Make spans opened in this context (and its thread) children of the trace's root."""
+        root = self.root(trace_id)
+        token = _current.set((trace_id, root.span_id if root else None))
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a block as a child of the current span. A no-op outside an active trace."""
+        current = _current.get()
+        if current is None:
+            yield None
+            return
+        trace_id, parent_id = current
+        span = Span(trace_id, name, time.time(), parent_id=parent_id, attributes=attributes)
+        self._record(span)
+        token = _current.set((trace_id, span.span_id))
+        try:
+            yield span
+        except Exception as e:
+            span.attributes["error"] = str(e)
+            raise
+        finally:
+            span.end = time.time()
+            _current.reset(token)
+
+    def finish_trace(self, trace_id: str, **attributes):
+        """Close the root span and export the trace."""
+        root = self.root(trace_id)
+        if root is None:
+            return
+        root.end = time.time()
+        root.attributes.update(attributes)
+        self._export(self.get(trace_id))
+
+    # -- reading -----------------------------------------------------------
+
+    def get(self, trace_id: str) -> list[Span]:
+        with self._lock:
+            return list(self._traces.get(trace_id, []))
+
+    def view(self, trace_id: str) -> Optional[dict]:
+        """The trace as a timeline: every span with its offset from the root and duration, in ms."""
+        spans = self.get(trace_id)
+        if not spans:
+            return None
+        origin = min(s.start for s in spans)
+        end = max((s.end or s.start) for s in spans)
+        return {
+            "event_id": trace_id,
+            "complete": spans[0].end is not None,
+            "duration_ms": round((end - origin) * 1000, 2),
+            "spans": [
+                {
+                    "name": s.name,
+                    "span_id": s.span_id,
+                    "parent_id": s.parent_id,
+                    "offset_ms": round((s.start - origin) * 1000, 2),
+                    "duration_ms": round(((s.end or s.start) - s.start) * 1000, 2) if s.end else None,
+                    "attributes": s.attributes,
+                }
+                for s in sorted(spans, key=lambda s: s.start)
+            ],
+        }
+
+    # -- export ------------------------------------------------------------
+
+    def _export(self, spans: list[Span]):
+        if self.trace_file:
+            try:
+                with self._lock, open(self.trace_file, "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(asdict(s), default=str) + "\n" for s in spans)
+            except OSError as e:
+                logger.warning(f"Trace file export failed: {e}")
+        if self.otlp_endpoint:
+            threading.Thread(target=self._post_otlp, args=(spans,), daemon=True).start()
+
+    def _post_otlp(self, spans: list[Span]):
+        import httpx
+        try:
+            httpx.post(self.otlp_endpoint, json=to_otlp(spans), timeout=5).raise_for_status()
+        except Exception as e:
+            logger.warning(f"OTLP export failed: {e}")
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: list[Span]) -> dict:
+    """OTLP/HTTP JSON payload for spans. Event ids (UUIDs) double as 128-bit trace ids."""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "tracecontext"}}]},
+        "scopeSpans": [{
+            "scope": {"name": "tracecontext"},
+            "spans": [
+                {
+                    "traceId": s.trace_id.replace("-", ""),
+                    "spanId": s.span_id,
+                    **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                    "name": s.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(int(s.start * 1e9)),
+                    "endTimeUnixNano": str(int((s.end or s.start) * 1e9)),
+                    "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                }
+                for s in spans
+            ],
+        }],
+    }]}
+
+
+tracer = Tracer()